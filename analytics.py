@@ -0,0 +1,115 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Без NumPy агрегати рахуються звичайними циклами
+    np = None
+
+
+class BuildingAnalytics:
+    # Агреговані показники по квартирах і мешканцях будинку.
+    # Дані зберігаються стовпцями; якщо встановлено NumPy, групування виконується векторизовано.
+    def __init__(self, floors, areas, num_rooms, occupants, ages):
+        # Стовпці копіюються: подання без копіювання (наприклад, ColumnarStore.numpy_column) утримували б буфер
+        # сховища, і додавання записів у нього завершувалось би BufferError, поки існує цей об'єкт
+        if np is not None:
+            floors = np.array(floors, dtype=np.int64)
+            areas = np.array(areas, dtype=np.float64)
+            num_rooms = np.array(num_rooms, dtype=np.int64)
+            occupants = np.array(occupants, dtype=np.int64)
+            ages = np.array(ages, dtype=np.int64)
+        self.floors = floors  # Поверх кожної квартири
+        self.areas = areas  # Площа кожної квартири
+        self.num_rooms = num_rooms  # Кількість кімнат у кожній квартирі
+        self.occupants = occupants  # Кількість мешканців у кожній квартирі
+        self.ages = ages  # Вік кожного мешканця
+
+    @classmethod
+    def from_managers(cls, resident_manager, apartment_manager):
+        # Будує стовпці з об'єктів менеджерів квартир і мешканців
+        apartments = apartment_manager.apartments
+        return cls(array('i', [apartment.floor for apartment in apartments]),
+                   array('d', [apartment.area for apartment in apartments]),
+                   array('i', [apartment.num_rooms for apartment in apartments]),
+                   array('i', [len(apartment.residents) for apartment in apartments]),
+                   array('i', [resident.age for resident in resident_manager.residents]))
+
+    @classmethod
+    def from_store(cls, store):
+        # Використовує стовпці ColumnarStore без обходу окремих записів
+        if np is not None:
+            links = store.numpy_column("resident_apartments")
+            occupants = np.bincount(links[links >= 0], minlength=store.apartment_count())
+            return cls(store.numpy_column("floors"), store.numpy_column("areas"), store.numpy_column("num_rooms"),
+                       occupants, store.numpy_column("ages"))
+        occupants = array('i', bytes(4 * store.apartment_count()))
+        for apartment_index in store.resident_apartments:
+            if apartment_index >= 0:
+                occupants[apartment_index] += 1
+        return cls(array('i', store.floors), array('d', store.areas), array('i', store.num_rooms), occupants,
+                   array('i', store.ages))
+
+    def area_by_floor(self):
+        # Повертає {поверх: (загальна площа, середня площа)}
+        counts = _group_sum(self.floors, None)
+        totals = _group_sum(self.floors, self.areas)
+        return {floor: (totals[floor], totals[floor] / counts[floor]) for floor in counts}
+
+    def room_histogram(self):
+        # Повертає {кількість кімнат: кількість квартир}
+        return _group_sum(self.num_rooms, None)
+
+    def occupancy_density(self):
+        # Повертає кількість мешканців на м² по будинку загалом і по кожному поверху
+        total_area = float(np.sum(self.areas)) if np is not None else sum(self.areas)
+        total_occupants = int(np.sum(self.occupants)) if np is not None else sum(self.occupants)
+        areas = _group_sum(self.floors, self.areas)
+        occupants = _group_sum(self.floors, self.occupants)
+        by_floor = {floor: occupants[floor] / areas[floor] if areas[floor] else 0.0 for floor in areas}
+        return (total_occupants / total_area if total_area else 0.0), by_floor
+
+    def age_distribution(self, bin_width=10):
+        # Повертає {(від, до): кількість мешканців} для вікових груп шириною bin_width років
+        if np is not None:
+            bins = self.ages // bin_width
+            histogram = _group_sum(bins, None)
+        else:
+            histogram = _group_sum([age // bin_width for age in self.ages], None)
+        return {(group * bin_width, group * bin_width + bin_width - 1): count for group, count in histogram.items()}
+
+    def summary_lines(self):
+        # Повертає рядки звіту з усіма показниками
+        lines = ["Аналітика по будинку:", "Площа за поверхами:"]
+        for floor, (total, mean) in self.area_by_floor().items():
+            lines.append(f"  Поверх {floor}: загальна площа {total:.1f}, середня площа {mean:.1f}")
+        lines.append("Кількість квартир за кількістю кімнат:")
+        for num_rooms, count in self.room_histogram().items():
+            lines.append(f"  {num_rooms} кімн.: {count}")
+        total_density, by_floor = self.occupancy_density()
+        lines.append(f"Щільність заселення: {total_density:.4f} мешканців на м²")
+        for floor, density in by_floor.items():
+            lines.append(f"  Поверх {floor}: {density:.4f} мешканців на м²")
+        lines.append("Вік мешканців:")
+        for (low, high), count in self.age_distribution().items():
+            lines.append(f"  {low}-{high} років: {count}")
+        return lines
+
+
+def _group_sum(keys, weights):
+    # Сумує weights (або рахує кількість, якщо weights = None) для кожного значення keys; результат впорядковано за ключем
+    if np is not None:
+        keys = np.asarray(keys)
+        if not len(keys):
+            return {}
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=None if weights is None else np.asarray(weights, dtype=np.float64))
+        cast = int if weights is None or np.asarray(weights).dtype.kind in "iu" else float
+        return {int(key): cast(value) for key, value in zip(unique, sums)}
+    sums = {}
+    if weights is None:
+        for key in keys:
+            sums[key] = sums.get(key, 0) + 1
+    else:
+        for key, weight in zip(keys, weights):
+            sums[key] = sums.get(key, 0) + weight
+    return dict(sorted(sums.items()))
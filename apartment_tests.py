@@ -1,5 +1,30 @@
+import asyncio
+import io
+import json
+import os
+import random
+import tempfile
+import threading
 import unittest
-from main import ResidentManager, ApartmentManager, ResidentHandler, Resident, Apartment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from batch import BatchProcessor
+from benchmarks import compare, run_suite
+from buildings import BuildingRegistry
+from load_generator import HttpClient
+from server import RegistryServer
+from analytics import BuildingAnalytics
+from concurrency import ConcurrentResidentHandler
+from metrics import Metrics
+from search import _SortedKeys
+from snapshot import Snapshot
+from columnar import ColumnarStore, SlotApartment, SlotResident
+from main import (ResidentManager, ApartmentManager, ResidentHandler, Resident, Apartment, Storage, SQLiteStorage, Reports,
+                  UserInterface)
 
 class TestResidentManager(unittest.TestCase):
     def test_add_resident(self):
@@ -15,6 +40,58 @@ class TestResidentManager(unittest.TestCase):
         resident_manager.remove_resident(resident)
         self.assertNotIn(resident, resident_manager.residents)
 
+    def test_find_residents(self):
+        resident_manager = ResidentManager()
+        first = Resident("John Doe", 25, "123-45-678")
+        second = Resident("John Doe", 40, "555-55-555")
+        resident_manager.add_resident(first)
+        resident_manager.add_resident(second)
+        self.assertEqual(resident_manager.find_residents("John Doe"), [first, second])
+        resident_manager.remove_resident(first)
+        self.assertEqual(resident_manager.find_residents("John Doe"), [second])
+        resident_manager.remove_resident(second)
+        self.assertEqual(resident_manager.find_residents("John Doe"), [])
+
+    def test_search_residents(self):
+        resident_manager = ResidentManager()
+        shevchenko = Resident("Шевченко Тарас Григорович", 47, "+380 (44) 123-45-67")
+        resident_manager.residents = [shevchenko, Resident("Коваленко Олена", 30, "050-111-22-33")]
+        self.assertEqual(resident_manager.search_residents("Тарас"), [shevchenko])
+        self.assertEqual(resident_manager.search_residents("380441234"), [shevchenko])
+        self.assertEqual(resident_manager.search_residents("Шевчнко Тарас")[0], shevchenko)
+
+        kovalenko = Resident("Коваленко Олег", 52, "")
+        resident_manager.add_resident(kovalenko)
+        self.assertEqual(len(resident_manager.search_residents("коваленко ол")), 2)
+        self.assertEqual(resident_manager.search_residents("коваленко олег")[0], kovalenko)
+        resident_manager.remove_resident(shevchenko)
+        self.assertNotIn(shevchenko, resident_manager.search_residents("Шевчнко Тарас"))
+
+        success, message = ResidentHandler().assign(resident_manager, ApartmentManager(), "Коваленко Олек", "1")
+        self.assertFalse(success)
+        self.assertIn("Коваленко Олег", message)
+
+        # Повідомлення про ненайденого мешканця не будує індекс пошуку
+        resident_manager.residents = [kovalenko]
+        success, message = ResidentHandler().assign(resident_manager, ApartmentManager(), "Коваленко Олек", "1")
+        self.assertEqual((success, message), (False, "Мешканця не знайдено."))
+        self.assertIsNone(resident_manager._search_index)
+
+    def test_sorted_keys_chunks(self):
+        keys = _SortedKeys()
+        keys.load = 4
+        expected, random_generator = [], random.Random(7)
+        for ident in range(200):
+            key = f"{random_generator.randrange(30):02d}"
+            keys.add(key, ident)
+            expected.append((key, ident))
+        for key, ident in expected[::3]:
+            keys.remove(key, ident)
+        expected = [pair for index, pair in enumerate(expected) if index % 3]
+        self.assertEqual(len(keys), len(expected))
+        self.assertEqual(sorted(keys.prefix("1")), sorted(pair for pair in expected if pair[0].startswith("1")))
+        self.assertEqual([key for key, _ in keys.prefix("")], sorted(key for key, _ in expected))
+
 class TestApartmentManager(unittest.TestCase):
     def test_add_apartment(self):
         apartment_manager = ApartmentManager()
@@ -29,6 +106,53 @@ class TestApartmentManager(unittest.TestCase):
         apartment_manager.remove_apartment("102")
         self.assertNotIn(apartment, apartment_manager.apartments)
 
+    def test_get_apartment(self):
+        apartment_manager = ApartmentManager()
+        apartment = Apartment("103", 3, 45.0, 1)
+        apartment_manager.add_apartment(apartment)
+        self.assertIs(apartment_manager.get_apartment("103"), apartment)
+        apartment_manager.remove_apartment("103")
+        self.assertIsNone(apartment_manager.get_apartment("103"))
+
+    def test_find_apartments_by_ranges(self):
+        apartment_manager = ApartmentManager()
+        for number, floor, area, num_rooms in [("1", 1, 40.0, 1), ("2", 3, 55.5, 2), ("3", 4, 48.0, 2),
+                                               ("4", 5, 75.0, 3), ("5", 2, 59.9, 2)]:
+            apartment_manager.add_apartment(Apartment(number, floor, area, num_rooms))
+        by_area = apartment_manager.find_apartments(area=(45, 60), order_by="area")
+        self.assertEqual([a.apartment_number for a in by_area], ["3", "2", "5"])
+        combined = apartment_manager.find_apartments(floor=(3, None), num_rooms=2)
+        self.assertEqual(sorted(a.apartment_number for a in combined), ["2", "3"])
+        page = apartment_manager.find_apartments(order_by="area", descending=True, limit=2, offset=1)
+        self.assertEqual([a.apartment_number for a in page], ["5", "2"])
+
+    def test_indexes_follow_removal(self):
+        apartment_manager = ApartmentManager()
+        apartment_manager.add_apartment(Apartment("1", 1, 50.0, 2))
+        apartment_manager.add_apartment(Apartment("2", 1, 50.0, 2))
+        apartment_manager.remove_apartment("1")
+        self.assertEqual([a.apartment_number for a in apartment_manager.get_apartments_by_floor(1)], ["2"])
+        self.assertEqual([a.apartment_number for a in apartment_manager.get_apartments_by_area(50.0)], ["2"])
+        self.assertEqual(apartment_manager.get_apartments_by_num_rooms(3), [])
+
+    def test_vacancy_index_follows_move_in_and_out(self):
+        apartment_manager = ApartmentManager()
+        first = Apartment("1", 1, 50.0, 2)
+        second = Apartment("2", 1, 60.0, 3)
+        apartment_manager.add_apartment(first)
+        apartment_manager.add_apartment(second)
+        resident = Resident("John Doe", 25, "123-45-678")
+        apartment_manager.move_in(resident, first)
+        self.assertEqual(apartment_manager.get_vacant_apartments(), [second])
+        self.assertEqual(apartment_manager.occupancy_rate_by_floor(), {1: 0.5})
+        apartment_manager.move_in(resident, second)
+        self.assertEqual(first.residents, [])
+        self.assertEqual(apartment_manager.get_vacant_apartments(), [first])
+        self.assertIs(apartment_manager.move_out(resident), second)
+        self.assertEqual(second.residents, [])
+        self.assertEqual(apartment_manager.vacancy_count(), 2)
+        self.assertEqual(apartment_manager.occupancy_rate_by_num_rooms(), {2: 0.0, 3: 0.0})
+
 class TestResidentHandler(unittest.TestCase):
     def test_assign_resident_to_apartment(self):
         resident_manager = ResidentManager()
@@ -38,7 +162,7 @@ class TestResidentHandler(unittest.TestCase):
         apartment = Apartment("101", 1, 50.0, 2)
         resident_manager.add_resident(resident)
         apartment_manager.add_apartment(apartment)
-        resident_handler.assign_resident_to_apartment(resident_manager, apartment_manager)
+        resident_handler.assign_resident_to_apartment(resident_manager, apartment_manager, "John Doe", "101")
         self.assertEqual(resident.apartment, apartment)
 
     def test_evacuate_resident_from_apartment(self):
@@ -50,8 +174,657 @@ class TestResidentHandler(unittest.TestCase):
         resident_manager.add_resident(resident)
         apartment_manager.add_apartment(apartment)
         resident.apartment = apartment
-        resident_handler.evacuate_resident_from_apartment(resident_manager, apartment_manager)
+        resident_handler.evacuate_resident_from_apartment(resident_manager, apartment_manager, "Alice Smith")
+        self.assertIsNone(resident.apartment)
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.storage = Storage(os.path.join(self.directory.name, "residents_data.csv"),
+                               os.path.join(self.directory.name, "apartments_data.csv"),
+                               ResidentManager(), ApartmentManager())
+
+    def test_load_all_links_fresh_objects(self):
+        apartment = Apartment("101", 1, 50.0, 2)
+        tenant = Resident("Peter", 18, "124214125")
+        tenant.apartment = apartment
+        apartment.residents.append(tenant)
+        self.storage.save_apartments([apartment, Apartment("102", 1, 90.0, 3)])
+        self.storage.save_residents([Resident("Jason", 30, "123-45-67"), tenant])
+
+        residents, apartments = self.storage.load_all()
+        self.assertEqual([r.full_name for r in residents], ["Jason", "Peter"])
+        self.assertEqual([a.apartment_number for a in apartments], ["101", "102"])
+        self.assertIsNone(residents[0].apartment)
+        self.assertIs(residents[1].apartment, apartments[0])
+        self.assertEqual(apartments[0].residents, [residents[1]])
+        self.assertEqual(apartments[1].residents, [])
+
+    def test_streaming_rows_in_chunks(self):
+        written = []
+        rows = ((f"Resident {i}", 20 + i, f"{i:03d}", "") for i in range(25))
+        count = self.storage.write_resident_rows(rows, chunk_size=10, progress=lambda name, done: written.append(done))
+        self.assertEqual(count, 25)
+        self.assertEqual(written, [10, 20, 25])
+
+        chunks = list(self.storage.iter_resident_rows(chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(chunks[2][-1], ("Resident 24", 44, "024", ""))
+
+    def test_incremental_save_and_replay(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        jason = Resident("Jason", 30, "123-45-67")
+        resident_manager.add_resident(jason)
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2))
+        self.storage.compact()
+
+        apartment_manager.add_apartment(Apartment("102", 2, 70.0, 3))
+        apartment_manager.move_in(jason, apartment_manager.get_apartment("102"))
+        resident_manager.add_resident(Resident("Sandra", 24, "765-43-21"))
+        self.storage.save_changes()
+        with open(self.storage.journal_file, encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 3)
+        with open(self.storage.journal_file, mode='a', encoding='utf-8') as file:
+            file.write('{"op": "resid')
+
+        restored = Storage(self.storage.residents_data_file, self.storage.apartments_data_file,
+                           ResidentManager(), ApartmentManager())
+        restored.load_data()
+        self.assertEqual(restored.journal_entries, 3)
+        self.assertEqual(sorted(r.full_name for r in restored.resident_manager.residents), ["Jason", "Sandra"])
+        apartment = restored.apartment_manager.get_apartment("102")
+        self.assertEqual([r.full_name for r in apartment.residents], ["Jason"])
+        self.assertEqual(restored.apartment_manager.get_vacant_apartments(),
+                         [restored.apartment_manager.get_apartment("101")])
+
+    def test_torn_journal_tail_is_truncated_before_next_save(self):
+        resident_manager = self.storage.resident_manager
+        self.storage.compact()
+        resident_manager.add_resident(Resident("A", 30, ""))
+        self.storage.save_changes()
+        with open(self.storage.journal_file, mode='a', encoding='utf-8') as file:
+            file.write('{"op": "resid')
+
+        reloaded = Storage(self.storage.residents_data_file, self.storage.apartments_data_file,
+                           ResidentManager(), ApartmentManager())
+        reloaded.load_data()
+        reloaded.resident_manager.add_resident(Resident("B", 40, ""))
+        reloaded.save_changes()
+
+        restored = Storage(self.storage.residents_data_file, self.storage.apartments_data_file,
+                           ResidentManager(), ApartmentManager())
+        restored.load_data()
+        self.assertEqual(restored.journal_entries, 2)
+        self.assertEqual(sorted(r.full_name for r in restored.resident_manager.residents), ["A", "B"])
+
+    def test_removing_occupied_apartment_evacuates_residents(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        peter = Resident("Peter", 18, "124214125")
+        resident_manager.add_resident(peter)
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2), verbose=False)
+        apartment_manager.move_in(peter, apartment_manager.get_apartment("101"))
+        self.storage.compact()
+
+        apartment_manager.remove_apartment("101", verbose=False)
+        self.assertIsNone(peter.apartment)
+        self.storage.save_changes()
+        restored = Storage(self.storage.residents_data_file, self.storage.apartments_data_file,
+                           ResidentManager(), ApartmentManager())
+        restored.load_data()
+        self.assertEqual(restored.apartment_manager.apartments, [])
+        self.assertIsNone(restored.resident_manager.find_residents("Peter")[0].apartment)
+
+    def test_compact_folds_journal(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2))
+        self.storage.compact()
+        apartment_manager.remove_apartment("101")
+        resident_manager.add_resident(Resident("Peter", 18, "124214125"))
+        self.storage.save_changes()
+        self.storage.compact()
+        self.assertEqual(os.path.getsize(self.storage.journal_file), 0)
+        residents, apartments = self.storage.load_all()
+        self.assertEqual([r.full_name for r in residents], ["Peter"])
+        self.assertEqual(apartments, [])
+
+    def test_binary_snapshot_round_trip(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        for apartment in (Apartment("101", 1, 50.5, 2), Apartment("102", 3, 90.0, 3)):
+            apartment_manager.add_apartment(apartment, verbose=False)
+        for name, phone in (("Петро", "124214125"), ("Jason", "123-45-67"), ("Sandra", "123-45-67")):
+            resident_manager.add_resident(Resident(name, 30, phone))
+        apartment_manager.move_in(resident_manager.find_residents("Петро")[0], apartment_manager.get_apartment("102"))
+        file_name = os.path.join(self.directory.name, "registry.snapshot")
+        self.storage.save_snapshot(file_name)
+
+        residents, apartments = self.storage.load_snapshot(file_name)
+        self.assertEqual([str(r) for r in residents], [str(r) for r in resident_manager.residents])
+        self.assertEqual([str(a) for a in apartments], [str(a) for a in apartment_manager.apartments])
+        self.assertIs(residents[0].apartment, apartments[1])
+
+        with Snapshot(file_name) as snapshot:
+            self.assertEqual(list(snapshot.areas), [50.5, 90.0])
+            self.assertEqual(snapshot.string(snapshot.full_names[0]), "Петро")
+            self.assertEqual(snapshot.string_count, 7)
+            store = snapshot.to_columnar()
+        self.assertEqual([r.full_name for r in store.get_apartment("102").residents], ["Петро"])
+
+    def test_snapshot_strings_with_nul_and_truncated_file(self):
+        resident_manager = self.storage.resident_manager
+        resident_manager.residents = [Resident("a\0b", 30, "x"), Resident("c", 40, "y")]
+        file_name = os.path.join(self.directory.name, "registry.snapshot")
+        self.storage.save_snapshot(file_name)
+        residents, _ = self.storage.load_snapshot(file_name)
+        self.assertEqual([(r.full_name, r.phone) for r in residents], [("a\0b", "x"), ("c", "y")])
+
+        with open(file_name, mode='r+b') as file:
+            file.truncate(os.path.getsize(file_name) - 3)
+        with self.assertRaises(ValueError):
+            Snapshot(file_name)
+        self.assertFalse(self.storage.load_data_from_snapshot(file_name))
+        self.assertEqual(len(resident_manager.residents), 2)
+
+    def test_load_data_from_snapshot(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        apartment_manager.add_apartment(Apartment("101", 1, 50.5, 2), verbose=False)
+        resident_manager.add_resident(Resident("Петро", 30, "124214125"))
+        apartment_manager.move_in(resident_manager.residents[0], apartment_manager.get_apartment("101"))
+        self.storage.save_changes()
+        file_name = os.path.join(self.directory.name, "registry.snapshot")
+        self.storage.save_snapshot(file_name)
+        resident_manager.add_resident(Resident("Jason", 24, "123-45-67"))
+        self.storage.save_changes()
+
+        self.assertFalse(self.storage.load_data_from_snapshot(os.path.join(self.directory.name, "missing.snapshot")))
+        self.assertEqual(len(resident_manager.residents), 2)
+        self.assertTrue(self.storage.load_data_from_snapshot(file_name))
+        self.assertEqual([r.full_name for r in resident_manager.residents], ["Петро"])
+        self.assertIs(resident_manager.find_residents("Петро")[0].apartment, apartment_manager.get_apartment("101"))
+
+        # Файли і журнал містять Jason, тож після знімка збереження переписує їх повністю
+        self.storage.save_changes()
+        self.assertEqual(os.path.getsize(self.storage.journal_file), 0)
+        residents, apartments = self.storage.load_all()
+        self.assertEqual([str(r) for r in residents], [str(r) for r in resident_manager.residents])
+
+    def test_load_all_missing_files(self):
+        self.assertEqual(self.storage.load_all(), ([], []))
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.csv_storage = Storage(os.path.join(self.directory.name, "residents_data.csv"),
+                                   os.path.join(self.directory.name, "apartments_data.csv"),
+                                   ResidentManager(), ApartmentManager())
+        self.storage = SQLiteStorage(":memory:", ResidentManager(), ApartmentManager())
+        self.addCleanup(self.storage.close)
+
+    def test_import_query_and_export_csv(self):
+        peter = Resident("Peter", 18, "124214125")
+        apartments = [Apartment("101", 1, 50.0, 2), Apartment("102", 1, 90.0, 3), Apartment("201", 2, 55.0, 2)]
+        peter.apartment = apartments[0]
+        apartments[0].residents.append(peter)
+        self.csv_storage.save_apartments(apartments)
+        self.csv_storage.save_residents([Resident("Jason", 30, "123-45-67"), peter])
+
+        self.storage.import_csv(self.csv_storage)
+        self.assertEqual([a.apartment_number for a in self.storage.get_apartments_by_num_rooms(2)], ["101", "201"])
+        self.assertEqual([a.apartment_number for a in self.storage.find_apartments(area=(50, 60), floor=2)], ["201"])
+        self.assertEqual([a.apartment_number for a in self.storage.get_vacant_apartments()], ["102", "201"])
+        self.assertEqual([r.full_name for r in self.storage.get_apartment("101").residents], ["Peter"])
+
+        os.remove(self.csv_storage.residents_data_file)
+        self.storage.export_csv(self.csv_storage)
+        residents, apartments = self.csv_storage.load_all()
+        self.assertEqual([r.full_name for r in residents], ["Jason", "Peter"])
+        self.assertEqual([r.full_name for r in apartments[0].residents], ["Peter"])
+
+    def test_save_changes_and_load_data(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        jason = Resident("Jason", 30, "123-45-67")
+        resident_manager.add_resident(jason)
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2))
+        apartment_manager.add_apartment(Apartment("102", 1, 90.0, 3))
+        self.storage.compact()
+        apartment_manager.move_in(jason, apartment_manager.get_apartment("102"))
+        apartment_manager.remove_apartment("101")
+        self.storage.save_changes()
+
+        self.storage.load_data()
+        self.assertEqual([a.apartment_number for a in apartment_manager.apartments], ["102"])
+        self.assertEqual(resident_manager.find_residents("Jason")[0].apartment.apartment_number, "102")
+
+    def test_user_interface_queries_database_until_loaded(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2), verbose=False)
+        self.storage.compact()
+        apartment_manager.apartments = []
+
+        user_interface = UserInterface(resident_manager, apartment_manager, self.storage)
+        self.assertIs(user_interface.apartment_queries, self.storage)
+        self.assertEqual([a.apartment_number for a in user_interface.apartment_queries.get_vacant_apartments()],
+                         ["101"])
+
+        user_interface.load_data_from_file()
+        user_interface.loaded_data = True
+        self.assertIs(user_interface.apartment_queries, apartment_manager)
+        self.assertEqual(len(apartment_manager.apartments), 1)
+
+    def test_user_interface_does_not_save_over_unloaded_database(self):
+        resident_manager, apartment_manager = self.storage.resident_manager, self.storage.apartment_manager
+        apartment_manager.add_apartment(Apartment("101", 7, 80.0, 4), verbose=False)
+        resident_manager.add_resident(Resident("Jason", 30, "123-45-67"))
+        resident_manager.add_resident(Resident("Jason", 41, "765-43-21"))
+        apartment_manager.move_in(resident_manager.residents[1], apartment_manager.get_apartment("101"))
+        self.storage.compact()
+        rows = self.storage.load_all()
+        resident_manager.residents, apartment_manager.apartments = [], []
+
+        # Дані, створені при запуску, з тими самими П.І.Б. і номером квартири, що й у базі
+        resident_manager.add_resident(Resident("Jason", 30, "123-45-67"))
+        apartment_manager.add_apartment(Apartment("101", 1, 50.0, 2), verbose=False)
+        user_interface = UserInterface(resident_manager, apartment_manager, self.storage)
+        user_interface.save_data()
+        self.assertEqual([[str(item) for item in part] for part in self.storage.load_all()],
+                         [[str(item) for item in part] for part in rows])
+
+class TestColumnar(unittest.TestCase):
+    def test_slot_models_match_plain_models(self):
+        apartment_manager = ApartmentManager()
+        resident = SlotResident("John Doe", 25, "123-45-678")
+        apartment = SlotApartment("101", 1, 50.0, 2)
+        apartment_manager.add_apartment(apartment)
+        apartment_manager.move_in(resident, apartment)
+        plain_resident, plain_apartment = Resident("John Doe", 25, "123-45-678"), Apartment("101", 1, 50.0, 2)
+        plain_resident.apartment = plain_apartment
+        plain_apartment.residents.append(plain_resident)
+        self.assertEqual(str(resident), str(plain_resident))
+        self.assertEqual(str(apartment), str(plain_apartment))
+        self.assertFalse(hasattr(resident, "__dict__"))
+
+    def test_columnar_views(self):
+        first, second = Apartment("101", 1, 50.0, 2), Apartment("102", 2, 75.5, 3)
+        peter, jason = Resident("Peter", 18, "124214125"), Resident("Jason", 30, "123-45-67")
+        peter.apartment = second
+        store = ColumnarStore.from_objects([first, second], [peter, jason])
+        self.assertEqual(list(store.areas), [50.0, 75.5])
+        self.assertEqual(list(store.resident_apartments), [1, -1])
+        view = store.get_apartment("102")
+        self.assertEqual((view.floor, view.area, view.num_rooms), (2, 75.5, 3))
+        self.assertEqual([r.full_name for r in view.residents], ["Peter"])
+        self.assertEqual(store.resident(0).apartment, view)
+
+        store.resident(1).apartment = view
+        self.assertEqual([r.full_name for r in view.residents], ["Peter", "Jason"])
+        self.assertEqual(store.apartment(0).residents, [])
+        self.assertEqual(str(store.resident(1)), "П.І.Б.: Jason, Вік: 30, Телефон: 123-45-67, Проживає в квартирі 102")
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.resident_manager, self.apartment_manager = ResidentManager(), ApartmentManager()
+        for number, floor, area, num_rooms in [("101", 1, 40.0, 1), ("102", 1, 60.0, 2), ("201", 2, 80.0, 2)]:
+            self.apartment_manager.add_apartment(Apartment(number, floor, area, num_rooms), verbose=False)
+        for name, age, number in [("Peter", 18, "101"), ("Jason", 30, "201"), ("Sandra", 24, "201"), ("Ivan", 71, None)]:
+            resident = Resident(name, age, "")
+            self.resident_manager.add_resident(resident)
+            if number:
+                self.apartment_manager.move_in(resident, self.apartment_manager.get_apartment(number))
+
+    def check(self, analytics):
+        self.assertEqual(analytics.area_by_floor(), {1: (100.0, 50.0), 2: (80.0, 80.0)})
+        self.assertEqual(analytics.room_histogram(), {1: 1, 2: 2})
+        total, by_floor = analytics.occupancy_density()
+        self.assertAlmostEqual(total, 3 / 180.0)
+        self.assertEqual(by_floor, {1: 0.01, 2: 0.025})
+        self.assertEqual(analytics.age_distribution(), {(10, 19): 1, (20, 29): 1, (30, 39): 1, (70, 79): 1})
+
+    def test_from_managers(self):
+        self.check(BuildingAnalytics.from_managers(self.resident_manager, self.apartment_manager))
+
+    def test_from_store(self):
+        store = ColumnarStore.from_objects(self.apartment_manager.apartments, self.resident_manager.residents)
+        analytics = BuildingAnalytics.from_store(store)
+        store.add_apartment("301", 3, 100.0, 4)
+        self.check(analytics)
+
+    @unittest.skipUnless(np, "потрібен пакет numpy")
+    def test_from_store_vectorized_keeps_store_writable(self):
+        store = ColumnarStore.from_objects(self.apartment_manager.apartments, self.resident_manager.residents)
+        analytics = BuildingAnalytics.from_store(store)
+        self.assertIsInstance(analytics.areas, np.ndarray)
+        store.add_apartment("301", 3, 100.0, 4)
+        self.check(analytics)
+
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        self.apartment = Apartment("101", 1, 50.0, 2)
+        self.residents = [Resident(f"Resident {i}", 20 + i, f"{i:03d}") for i in range(5)]
+        self.residents[0].apartment = self.apartment
+        self.apartment.residents.append(self.residents[0])
+
+    def test_full_reports_text(self):
+        reports = Reports()
+        self.assertEqual(reports.generate_full_apartments_report([self.apartment]),
+                         "Звіт про квартири:\n" + str(self.apartment) + "\n")
+        report = reports.generate_full_residents_report(self.residents)
+        self.assertEqual(report.splitlines()[1], str(self.residents[0]))
+
+    def test_paginated_formats(self):
+        reports = Reports()
+        sink = io.StringIO()
+        count = reports.write_report(reports.iter_residents_report(iter(self.residents), "csv", page=2, page_size=2), sink)
+        self.assertEqual(count, 3)
+        self.assertEqual(sink.getvalue(), "full_name,age,phone,apartment\nResident 2,22,002,\nResident 3,23,003,\n")
+        lines = list(reports.iter_apartments_report([self.apartment], "jsonl"))
+        self.assertEqual(json.loads(lines[0]), {"apartment_number": "101", "floor": 1, "area": 50.0,
+                                                "num_rooms": 2, "residents": "Resident 0"})
+        with self.assertRaises(ValueError):
+            list(reports.iter_residents_report(self.residents, "xml"))
+
+class TestBatchProcessor(unittest.TestCase):
+    def test_apply_operations(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        results = BatchProcessor(resident_manager, apartment_manager).apply([
+            {"op": "add_apartment", "apartment_number": "101", "floor": 1, "area": 50.0, "num_rooms": 2},
+            {"op": "add_apartment", "apartment_number": "102", "floor": 1, "area": 65.0, "num_rooms": 3},
+            {"op": "add_resident", "full_name": "Jason", "age": 30, "phone": "123-45-67"},
+            {"op": "add_resident", "full_name": "Sandra", "age": 24},
+            {"op": "assign", "full_name": "Jason", "apartment_number": "101"},
+            {"op": "assign", "full_name": "Sandra", "apartment_number": 102},
+            {"op": "evacuate", "full_name": "Sandra"},
+            {"op": "remove_apartment", "apartment_number": "101"},
+            {"op": "assign", "full_name": "Nobody", "apartment_number": "102"},
+            {"op": "add_resident", "full_name": "Peter"},
+            {"op": "teleport"},
+        ])
+        self.assertEqual([result["ok"] for result in results], [True] * 8 + [False] * 3)
+        self.assertEqual(apartment_manager.get_vacant_apartments(), [apartment_manager.get_apartment("102")])
+        self.assertEqual(apartment_manager.find_apartments(area=(60, 70)), [apartment_manager.get_apartment("102")])
+        self.assertEqual([r.apartment for r in resident_manager.residents], [None, None])
+
+    def test_malformed_operations_are_reported(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        results = BatchProcessor(resident_manager, apartment_manager).apply([
+            '{"op": "add_resident", "full_name": "Jason", "age": 30}\n',
+            '{bad\n',
+            '[1, 2]\n',
+            {"op": "add_resident", "full_name": ["x"], "age": 1},
+            {"op": "add_resident", "full_name": "  ", "age": 1},
+            {"op": "add_resident", "full_name": 123, "age": 1, "phone": 5550101},
+            {"op": "add_resident", "full_name": "Peter", "age": 1, "phone": 5550101},
+            {"op": "assign", "full_name": "Jason", "apartment_number": ["101"]},
+        ])
+        self.assertEqual([(r["index"], r["ok"]) for r in results],
+                         [(0, True), (1, False), (2, False), (3, False), (4, False), (5, False), (6, False), (7, False)])
+        self.assertEqual([r.full_name for r in resident_manager.residents], ["Jason"])
+        self.assertIn("full_name", results[3]["message"])
+
+    def test_handler_without_prompts(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        resident = Resident("John Doe", 25, "123-45-678")
+        apartment = Apartment("101", 1, 50.0, 2)
+        resident_manager.add_resident(resident)
+        apartment_manager.add_apartment(apartment)
+        handler = ResidentHandler()
+        self.assertTrue(handler.assign_resident_to_apartment(resident_manager, apartment_manager, "John Doe", "101"))
+        self.assertIs(resident.apartment, apartment)
+        self.assertTrue(handler.evacuate_resident_from_apartment(resident_manager, apartment_manager, "John Doe"))
         self.assertIsNone(resident.apartment)
 
+class TestRegistryServer(unittest.TestCase):
+    def test_concurrent_requests(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        for number in range(10):
+            apartment_manager.add_apartment(Apartment(str(number), 1 + number % 3, 40.0 + number, 2), verbose=False)
+
+        async def scenario():
+            server = RegistryServer(resident_manager, apartment_manager, save_delay=0)
+            port = (await server.start(port=0)).sockets[0].getsockname()[1]
+            clients = [HttpClient("127.0.0.1", port) for _ in range(5)]
+            await asyncio.gather(*(client.connect() for client in clients))
+
+            async def move(client, index):
+                await client.request("POST", "/residents", {"full_name": f"Client {index}", "age": 30})
+                return await client.request("POST", "/assign", {"full_name": f"Client {index}", "apartment_number": str(index)})
+
+            moved = await asyncio.gather(*(move(client, index) for index, client in enumerate(clients)))
+            vacant = await clients[0].request("GET", "/vacant")
+            found = await clients[1].request("GET", "/apartments?floor=1&area_min=42")
+            missing = await clients[2].request("POST", "/assign", {"full_name": "Nobody", "apartment_number": "1"})
+            await asyncio.gather(*(client.close() for client in clients))
+            await server.stop()
+            return moved, vacant, found, missing
+
+        moved, vacant, found, missing = asyncio.run(scenario())
+        self.assertEqual([status for status, _ in moved], [200] * 5)
+        self.assertEqual(vacant, (200, {"count": 5, "apartments": ["5", "6", "7", "8", "9"]}))
+        self.assertEqual([a["apartment_number"] for a in found[1]], ["3", "6", "9"])
+        self.assertEqual(found[1][0]["residents"], ["Client 3"])
+        self.assertEqual(missing[0], 409)
+
+    def test_bad_requests_and_background_save(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        storage = Storage(os.path.join(directory.name, "residents_data.csv"),
+                          os.path.join(directory.name, "apartments_data.csv"), resident_manager, apartment_manager)
+
+        async def scenario():
+            server = RegistryServer(resident_manager, apartment_manager, storage, save_delay=0)
+            port = (await server.start(port=0)).sockets[0].getsockname()[1]
+            client = HttpClient("127.0.0.1", port)
+            await client.connect()
+            bad_name = await client.request("POST", "/assign", {"full_name": ["x"], "apartment_number": "1"})
+            bad_number = await client.request("POST", "/assign", {"full_name": "x", "apartment_number": 1})
+            bad_resident = await client.request("POST", "/residents", {"full_name": ["x"], "age": 30})
+            bad_phone = await client.request("POST", "/residents", {"full_name": "x", "age": 30, "phone": 5})
+            no_number = await client.request("POST", "/apartments", {"floor": 1, "area": 40.0, "num_rooms": 1})
+            bad_evacuate = await client.request("POST", "/evacuate", {"full_name": 1})
+            created = await client.request("POST", "/residents", {"full_name": "Jason", "age": 30})
+            missing = await client.request("POST", "/assign", {"full_name": "Jason", "apartment_number": "404"})
+            await asyncio.sleep(0.1)
+            await client.close()
+            await server.stop()
+            self.assertEqual(server._locks, {})
+            return [response[0] for response in (bad_name, bad_number, bad_resident, bad_phone, no_number,
+                                                 bad_evacuate, created, missing)]
+
+        self.assertEqual(asyncio.run(scenario()), [400, 400, 400, 400, 400, 400, 201, 409])
+        residents, _ = storage.load_all()
+        self.assertEqual([r.full_name for r in residents], ["Jason"])
+
+class TestConcurrentResidentHandler(unittest.TestCase):
+    def test_capacity_and_move(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        handler = ConcurrentResidentHandler(capacity_per_room=1)
+        apartment_manager.add_apartment(Apartment("101", 1, 30.0, 1), verbose=False)
+        apartment_manager.add_apartment(Apartment("102", 1, 30.0, 1), verbose=False)
+        for name in ("Jason", "Sandra"):
+            resident_manager.add_resident(Resident(name, 30, ""))
+        self.assertTrue(handler.assign(resident_manager, apartment_manager, "Jason", "101")[0])
+        self.assertEqual(handler.assign(resident_manager, apartment_manager, "Sandra", "101"),
+                         (False, "Квартира 101 заповнена."))
+        self.assertTrue(handler.assign(resident_manager, apartment_manager, "Jason", "102")[0])
+        self.assertEqual(apartment_manager.get_apartment("101").residents, [])
+        self.assertTrue(handler.evacuate(resident_manager, apartment_manager, "Jason")[0])
+        self.assertEqual(apartment_manager.vacancy_count(), 2)
+
+    def test_invariants_under_contention(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        handler = ConcurrentResidentHandler(capacity_per_room=1)
+        for number in range(10):
+            apartment_manager.add_apartment(Apartment(str(number), number % 3, 50.0, 1 + number % 2), verbose=False)
+        residents = [Resident(f"Resident {index}", 30, "") for index in range(40)]
+        for resident in residents:
+            resident_manager.add_resident(resident)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(2000):
+                resident = rng.choice(residents)
+                if rng.random() < 0.7:
+                    handler.move(apartment_manager, resident, apartment_manager.get_apartment(str(rng.randrange(10))))
+                else:
+                    handler.move(apartment_manager, resident, None)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        apartments = apartment_manager.apartments
+        for apartment in apartments:
+            self.assertLessEqual(len(apartment.residents), apartment.num_rooms)
+            self.assertEqual(len(set(apartment.residents)), len(apartment.residents))
+            for resident in apartment.residents:
+                self.assertIs(resident.apartment, apartment)
+        for resident in residents:
+            homes = [a for a in apartments if resident in a.residents]
+            self.assertEqual(homes, [resident.apartment] if resident.apartment else [])
+        self.assertEqual(set(apartment_manager.get_vacant_apartments()), {a for a in apartments if not a.residents})
+        self.assertEqual((handler._resident_locks, handler._apartment_locks), ({}, {}))
+
+    def test_removals_under_contention(self):
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        handler = ConcurrentResidentHandler()
+        residents = [Resident(f"Resident {index}", 30, "") for index in range(20)]
+        for resident in residents:
+            resident_manager.add_resident(resident)
+        for number in range(5):
+            apartment_manager.add_apartment(Apartment(str(number), 1, 50.0, 2), verbose=False)
+        stop = threading.Event()
+
+        def mover(seed):
+            rng = random.Random(seed)
+            while not stop.is_set():
+                handler.assign(resident_manager, apartment_manager, f"Resident {rng.randrange(20)}", str(rng.randrange(5)))
+
+        def remover():
+            rng = random.Random(99)
+            for _ in range(300):
+                number = str(rng.randrange(5))
+                handler.remove_apartment(apartment_manager, number)
+                with handler.index_lock:
+                    apartment_manager.add_apartment(Apartment(number, 1, 50.0, 2), verbose=False)
+            for index in range(0, 20, 2):
+                self.assertTrue(handler.remove_resident(resident_manager, apartment_manager, f"Resident {index}")[0])
+            stop.set()
+
+        threads = [threading.Thread(target=mover, args=(seed,)) for seed in range(4)]
+        threads.append(threading.Thread(target=remover))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(resident_manager.residents), 10)
+        apartments = set(apartment_manager.apartments)
+        for resident in residents:
+            if resident.apartment is not None:
+                self.assertIn(resident.apartment, apartments)
+                self.assertIn(resident, resident_manager.residents)
+        for apartment in apartments:
+            self.assertTrue(all(resident.apartment is apartment for resident in apartment.residents))
+        self.assertEqual((handler._resident_locks, handler._apartment_locks), ({}, {}))
+
+class TestBenchmarks(unittest.TestCase):
+    def test_run_suite_and_compare(self):
+        results = run_suite([50], repeat=1, cases=["apartments.vacant", "storage.load_csv"])
+        self.assertEqual([r["case"] for r in results], ["dataset.build", "apartments.vacant", "storage.load_csv"])
+        self.assertTrue(all(r["size"] == 50 and r["seconds"] >= 0 and r["peak_bytes"] is not None for r in results))
+        self.assertEqual(compare(results, {"results": results}), [])
+        slower = [dict(r, seconds=r["seconds"] + 1.0) for r in results]
+        self.assertEqual(len(compare(slower, {"results": results})), len(results))
+
+class TestMetrics(unittest.TestCase):
+    def test_enable_records_calls_and_disable_restores(self):
+        metrics = Metrics()
+        original = ApartmentManager.get_apartment
+        metrics.enable(ApartmentManager, Reports, exclude=("ApartmentManager.get_vacant_apartments",))
+        try:
+            apartment_manager = ApartmentManager()
+            apartment_manager.add_apartment(Apartment("1", 1, 40.0, 1), verbose=False)
+            apartment_manager.add_apartment(Apartment("2", 2, 60.0, 2), verbose=False)
+            apartment_manager.get_apartment("1")
+            apartment_manager.get_vacant_apartments()
+            lines = list(Reports().iter_apartments_report(apartment_manager.iter_apartments()))
+        finally:
+            metrics.disable()
+        self.assertIs(ApartmentManager.get_apartment, original)
+
+        methods = metrics.to_dict()["methods"]
+        self.assertEqual(methods["ApartmentManager.add_apartment"]["calls"], 2)
+        self.assertEqual(methods["ApartmentManager.get_apartment"]["items"], 1)
+        self.assertEqual(methods["Reports.iter_apartments_report"]["items"], len(lines))
+        self.assertNotIn("ApartmentManager.get_vacant_apartments", methods)
+        self.assertIn('registry_call_duration_seconds_count{method="ApartmentManager.add_apartment"} 2',
+                      metrics.to_prometheus())
+
+        with metrics.capture():
+            ApartmentManager().get_vacant_apartments()
+        self.assertIn("get_vacant_apartments", metrics.profile)
+
+class TestBuildingRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.registry = BuildingRegistry(self.directory.name, max_workers=2)
+        for name, numbers in (("A", ("1", "2")), ("B", ("1",))):
+            resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+            for number in numbers:
+                apartment_manager.add_apartment(Apartment(number, int(number), 40.0, 1), verbose=False)
+            resident = Resident(f"Мешканець {name}", 30, "")
+            resident_manager.add_resident(resident)
+            apartment_manager.move_in(resident, apartment_manager.get_apartment("1"))
+            self.registry.storage(name, resident_manager, apartment_manager).compact()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parallel_queries_are_merged(self):
+        self.assertEqual(self.registry.buildings(), ["A", "B"])
+        summary = self.registry.summary()
+        self.assertEqual(summary[None]["apartments"], 3)
+        self.assertEqual(summary[None]["vacant"], 1)
+        self.assertEqual(self.registry.vacant_apartments(), [("A", "2", 2, 40.0, 1)])
+        self.assertEqual(self.registry.validate(), {})
+        managers = self.registry.load()
+        self.assertEqual(managers["B"][1].get_apartment("1").residents[0].full_name, "Мешканець B")
+
+        sink = io.StringIO()
+        self.assertEqual(self.registry.write_report("residents", sink, "csv"), 3)
+        self.assertEqual(sink.getvalue().splitlines(),
+                         ["building,full_name,age,phone,apartment", "A,Мешканець A,30,,1", "B,Мешканець B,30,,1"])
+
+    def test_validate_reports_broken_links(self):
+        with open(os.path.join(self.directory.name, "B", "residents_data.csv"), mode='a', newline='') as file:
+            file.write("Привид,40,,99\n")
+        problems = self.registry.validate()
+        self.assertEqual(list(problems), ["B"])
+        self.assertIn("квартира 99 не існує", problems["B"][0])
+
+    def test_queries_read_journal_without_changing_files(self):
+        # Журнал будинку A: видалено квартиру 2, додано мешканця з посиланням на неї і недописаний хвіст
+        resident_manager, apartment_manager = ResidentManager(), ApartmentManager()
+        storage = self.registry.storage("A", resident_manager, apartment_manager)
+        storage.load_data()
+        apartment_manager.remove_apartment("2", verbose=False)
+        storage.save_changes()
+        with open(storage.journal_file, mode='a', encoding='utf-8') as file:
+            file.write(json.dumps({"op": "residents", "full_name": "Привид", "rows": [[40, "", "2"]]}) + "\n")
+            file.write('{"op": "resid')
+        journal_size = os.path.getsize(storage.journal_file)
+
+        self.assertEqual(self.registry.summary()["A"]["apartments"], 1)
+        self.assertEqual(self.registry.vacant_apartments(), [])
+        problems = self.registry.validate()["A"]
+        self.assertEqual(len(problems), 2)
+        self.assertIn("changes_journal.jsonl:2: квартира 2 не існує", problems[1])
+        self.assertIn("недописаний запис", problems[0])
+        self.assertEqual(os.path.getsize(storage.journal_file), journal_size)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import time
+
+from main import (Apartment, ApartmentManager, Resident, ResidentHandler, ResidentManager, SQLiteStorage, Storage,
+                  apartments_data_file, residents_data_file)
+
+
+class BatchProcessor:
+    # Клас застосовує пакет операцій до менеджерів без інтерактивного введення.
+    # Кожна операція - це словник з ключем "op" та параметрами, наприклад
+    # {"op": "assign", "full_name": "Jason", "apartment_number": "101"}.
+    def __init__(self, resident_manager, apartment_manager, storage=None):
+        self.resident_manager = resident_manager  # Менеджер мешканців
+        self.apartment_manager = apartment_manager  # Менеджер квартир
+        self.storage = storage  # Сховище, у яке зберігаються зміни після пакета (необов'язкове)
+        self.resident_handler = ResidentHandler()
+        self.handlers = {
+            "add_resident": self.add_resident,
+            "remove_resident": self.remove_resident,
+            "add_apartment": self.add_apartment,
+            "remove_apartment": self.remove_apartment,
+            "assign": self.assign,
+            "evacuate": self.evacuate,
+        }
+
+    def apply(self, operations):
+        # Виконує операції по черзі і повертає результат кожної: {"index", "op", "ok", "message"}.
+        # Операція - словник або рядок JSON з ним (як у файлі JSON Lines).
+        # Помилка в одній операції не зупиняє пакет; сховище зберігається один раз наприкінці.
+        results = []
+        with self.apartment_manager.bulk():
+            for index, operation in enumerate(operations):
+                op = None
+                try:
+                    if isinstance(operation, str):
+                        operation = json.loads(operation)
+                    if not isinstance(operation, dict):
+                        raise TypeError("операція має бути JSON-об'єктом")
+                    op = operation.get("op")
+                    handler = self.handlers.get(op)
+                    if handler is None:
+                        ok, message = False, f"Невідома операція {op}"
+                    else:
+                        ok, message = handler(operation)
+                except (KeyError, TypeError, ValueError) as e:
+                    ok, message = False, f"Некоректні параметри операції: {e!r}"
+                results.append({"index": index, "op": op if isinstance(op, str) else None, "ok": ok, "message": message})
+        if self.storage is not None:
+            self.storage.save_changes()
+        return results
+
+    @staticmethod
+    def _text(operation, field, default=None):
+        # Значення текстового поля операції; числа, списки й об'єкти JSON не перетворюються на рядки,
+        # а роблять операцію невдалою
+        value = operation[field] if default is None else operation.get(field, default)
+        if not isinstance(value, str):
+            raise TypeError(f"поле {field} має бути рядком")
+        return value
+
+    @staticmethod
+    def _apartment_number(operation):
+        # Номер квартири - рядок або ціле число JSON (як у файлах, де номери записані числами)
+        value = operation["apartment_number"]
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            raise TypeError("поле apartment_number має бути рядком або цілим числом")
+        return str(value)
+
+    def add_resident(self, operation):
+        full_name = self._text(operation, "full_name")
+        if not full_name.strip():
+            return False, "П.І.Б. мешканця не може бути порожнім."
+        resident = Resident(full_name, int(operation["age"]), self._text(operation, "phone", ""))
+        self.resident_manager.add_resident(resident)
+        return True, f"Мешканця {resident.full_name} додано."
+
+    def remove_resident(self, operation):
+        full_name = self._text(operation, "full_name")
+        residents = self.resident_manager.find_residents(full_name)
+        if not residents:
+            return False, f"Мешканця {full_name} не знайдено."
+        self.apartment_manager.move_out(residents[0])
+        self.resident_manager.remove_resident(residents[0])
+        return True, f"Мешканця {full_name} видалено."
+
+    def add_apartment(self, operation):
+        apartment = Apartment(self._apartment_number(operation), int(operation["floor"]), float(operation["area"]),
+                              int(operation["num_rooms"]))
+        if self.apartment_manager.add_apartment(apartment, verbose=False):
+            return True, f"Квартира {apartment.apartment_number} додана."
+        return False, f"Квартира {apartment.apartment_number} вже існує."
+
+    def remove_apartment(self, operation):
+        apartment_number = self._apartment_number(operation)
+        if not self.apartment_manager.remove_apartment(apartment_number, verbose=False):
+            return False, f"Квартира {apartment_number} не знайдена."
+        return True, f"Квартира {apartment_number} видалена."
+
+    def assign(self, operation):
+        return self.resident_handler.assign(self.resident_manager, self.apartment_manager,
+                                            self._text(operation, "full_name"), self._apartment_number(operation))
+
+    def evacuate(self, operation):
+        return self.resident_handler.evacuate(self.resident_manager, self.apartment_manager,
+                                              self._text(operation, "full_name"))
+
+
+def read_operations(file_name):
+    # Зчитує рядки операцій з файлу JSON Lines (одна операція на рядок, порожні рядки пропускаються);
+    # рядки розбираються в BatchProcessor.apply, тож некоректний рядок стає лише невдалою операцією
+    with open(file_name, mode='r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетне виконання операцій над мешканцями і квартирами")
+    parser.add_argument("operations", help="файл операцій у форматі JSON Lines")
+    parser.add_argument("--residents", default=residents_data_file, help="CSV-файл мешканців")
+    parser.add_argument("--apartments", default=apartments_data_file, help="CSV-файл квартир")
+    parser.add_argument("--sqlite", metavar="FILE", help="використовувати базу SQLite замість CSV-файлів")
+    parser.add_argument("--results", metavar="FILE", help="записати результат кожної операції у файл JSON Lines")
+    args = parser.parse_args()
+
+    resident_manager = ResidentManager()
+    apartment_manager = ApartmentManager()
+    if args.sqlite:
+        storage = SQLiteStorage(args.sqlite, resident_manager, apartment_manager)
+    else:
+        storage = Storage(args.residents, args.apartments, resident_manager, apartment_manager)
+    storage.load_data()
+
+    start = time.perf_counter()
+    results = BatchProcessor(resident_manager, apartment_manager, storage).apply(read_operations(args.operations))
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if not result["ok"]]
+    if args.results:
+        with open(args.results, mode='w', encoding='utf-8') as file:
+            file.writelines(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    else:
+        for result in failed:
+            print(f"Операція {result['index'] + 1} ({result['op']}): {result['message']}")
+    print(f"Виконано {len(results)} операцій за {elapsed:.2f} с: успішно {len(results) - len(failed)}, "
+          f"з помилками {len(failed)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from buildings import BuildingRegistry
+from columnar import ColumnarStore, SlotApartment, SlotResident
+from main import ApartmentManager, Apartment, Reports, Resident, ResidentManager, Storage
+from snapshot import Snapshot, write_snapshot
+
+
+def generate_apartments(count, seed=0):
+    # Генерує квартири з випадковими поверхом, площею та кількістю кімнат
+    rng = random.Random(seed)
+    return [Apartment(str(number), rng.randint(1, 25), round(rng.uniform(20.0, 150.0), 1), rng.randint(1, 5))
+            for number in range(1, count + 1)]
+
+
+def bench_vacancy(count=100_000, repeat=5):
+    # Порівнює індекс зайнятості з повним переглядом списку квартир
+    apartment_manager = ApartmentManager()
+    apartment_manager.apartments = generate_apartments(count)
+    for number, apartment in enumerate(apartment_manager.apartments):
+        if number % 2:
+            apartment_manager.move_in(Resident(f"Мешканець {number}", 30, ""), apartment)
+    apartments = apartment_manager.apartments
+
+    def scan():
+        return [apartment for apartment in apartments if not apartment.residents]
+
+    timings = {
+        "повний перегляд": scan,
+        "get_vacant_apartments": apartment_manager.get_vacant_apartments,
+        "vacancy_count": apartment_manager.vacancy_count,
+        "occupancy_rate_by_floor": apartment_manager.occupancy_rate_by_floor,
+    }
+    print(f"Вільні квартири серед {count} квартир (найкращий з {repeat} запусків):")
+    for name, function in timings.items():
+        best = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f"  {name}: {best * 1000:.3f} мс")
+
+
+def generate_residents(count, apartments, seed=0):
+    # Генерує мешканців; приблизно кожен п'ятий не заселений в жодну квартиру
+    rng = random.Random(seed)
+    residents = []
+    for number in range(count):
+        resident = Resident(f"Мешканець {number}", rng.randint(1, 95), f"{rng.randint(0, 9_999_999):07d}")
+        if apartments and rng.random() < 0.8:
+            apartment = apartments[rng.randrange(len(apartments))]
+            resident.apartment = apartment
+            apartment.residents.append(resident)
+        residents.append(resident)
+    return residents
+
+
+def bench_load(count=1_000_000):
+    # Вимірює завантаження і зв'язування мешканців та квартир з CSV-файлів
+    with tempfile.TemporaryDirectory() as directory:
+        storage = Storage(os.path.join(directory, "residents_data.csv"), os.path.join(directory, "apartments_data.csv"),
+                          ResidentManager(), ApartmentManager())
+        apartments = generate_apartments(count // 2)
+        storage.save_apartments(apartments)
+        storage.save_residents(generate_residents(count, apartments))
+        del apartments
+
+        start = time.perf_counter()
+        residents, apartments = storage.load_all()
+        elapsed = time.perf_counter() - start
+    linked = sum(1 for resident in residents if resident.apartment is not None)
+    print(f"Завантаження {len(residents)} мешканців і {len(apartments)} квартир: {elapsed:.2f} с "
+          f"({linked} мешканців заселено)")
+
+
+def bench_streaming(sizes=(100_000, 400_000, 1_600_000)):
+    # Показує, що пікова пам'ять потокового запису і читання не росте разом з розміром файлу
+    with tempfile.TemporaryDirectory() as directory:
+        storage = Storage(os.path.join(directory, "residents_data.csv"), os.path.join(directory, "apartments_data.csv"),
+                          ResidentManager(), ApartmentManager())
+        for count in sizes:
+            rows = ((f"Мешканець {number}", 18 + number % 80, f"{number:07d}", str(number % 5000))
+                    for number in range(count))
+            tracemalloc.start()
+            start = time.perf_counter()
+            storage.write_resident_rows(rows)
+            read = sum(len(chunk) for chunk in storage.iter_resident_rows())
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"Потоковий запис і читання {read} рядків: {elapsed:.2f} с, пік пам'яті {peak / 2 ** 20:.1f} МіБ")
+
+
+def bench_memory(count=200_000):
+    # Порівнює пам'ять, яку займають звичайні класи, варіанти з __slots__ і стовпцеве сховище
+    names = [f"Мешканець {number}" for number in range(count)]
+    phones = [f"{number:07d}" for number in range(count)]
+    numbers = [str(number) for number in range(count // 2)]
+
+    def build_objects(resident_cls, apartment_cls):
+        apartments = [apartment_cls(number, index % 25, 50.0 + index % 70, 1 + index % 5)
+                      for index, number in enumerate(numbers)]
+        residents = []
+        for index in range(count):
+            resident = resident_cls(names[index], 18 + index % 80, phones[index])
+            apartment = apartments[index % len(apartments)]
+            resident.apartment = apartment
+            apartment.residents.append(resident)
+            residents.append(resident)
+        return apartments, residents
+
+    def build_columnar():
+        store = ColumnarStore()
+        for index, number in enumerate(numbers):
+            store.add_apartment(number, index % 25, 50.0 + index % 70, 1 + index % 5)
+        for index in range(count):
+            store.add_resident(names[index], 18 + index % 80, phones[index], numbers[index % len(numbers)])
+        return store
+
+    variants = {
+        "Resident/Apartment": lambda: build_objects(Resident, Apartment),
+        "SlotResident/SlotApartment": lambda: build_objects(SlotResident, SlotApartment),
+        "ColumnarStore": build_columnar,
+    }
+    print(f"Пам'ять для {count} мешканців і {len(numbers)} квартир (рядки імен і телефонів спільні):")
+    for name, build in variants.items():
+        tracemalloc.start()
+        data = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data
+        print(f"  {name}: {size / 2 ** 20:.1f} МіБ")
+
+
+def bench_snapshot(count=1_000_000):
+    # Порівнює завантаження з CSV і з двійкового знімка
+    with tempfile.TemporaryDirectory() as directory:
+        storage = Storage(os.path.join(directory, "residents_data.csv"), os.path.join(directory, "apartments_data.csv"),
+                          ResidentManager(), ApartmentManager())
+        snapshot_file = os.path.join(directory, "registry.snapshot")
+        apartments = generate_apartments(count // 2)
+        residents = generate_residents(count, apartments)
+        storage.save_apartments(apartments)
+        storage.save_residents(residents)
+        write_snapshot(snapshot_file, apartments, residents)
+        del apartments, residents
+
+        timings = {}
+        start = time.perf_counter()
+        storage.load_all()
+        timings["CSV -> об'єкти (load_all)"] = time.perf_counter() - start
+        start = time.perf_counter()
+        storage.load_snapshot(snapshot_file)
+        timings["знімок -> об'єкти (load_snapshot)"] = time.perf_counter() - start
+        start = time.perf_counter()
+        with Snapshot(snapshot_file) as snapshot:
+            snapshot.to_columnar()
+        timings["знімок -> ColumnarStore"] = time.perf_counter() - start
+        start = time.perf_counter()
+        with Snapshot(snapshot_file) as snapshot:
+            total_area = sum(snapshot.areas)
+        timings["знімок через mmap, сума площ"] = time.perf_counter() - start
+    print(f"Завантаження {count} мешканців і {count // 2} квартир (загальна площа {total_area:.0f}):")
+    for name, elapsed in timings.items():
+        print(f"  {name}: {elapsed:.3f} с")
+
+
+def bench_buildings(buildings=4, count=200_000):
+    # Порівнює послідовну і паралельну обробку кількох будинків (зведення і спільний звіт)
+    with tempfile.TemporaryDirectory() as directory:
+        registry = BuildingRegistry(directory)
+        for index in range(buildings):
+            storage = registry.storage(f"Будинок {index + 1}", ResidentManager(), ApartmentManager())
+            apartments = generate_apartments(count // 2, index)
+            storage.write_apartment_rows(map(Storage.apartment_row, apartments))
+            storage.write_resident_rows(map(Storage.resident_row, generate_residents(count, apartments, index)))
+            del apartments
+        print(f"{buildings} будинків по {count} мешканців і {count // 2} квартир:")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            registry.max_workers = workers
+            start = time.perf_counter()
+            registry.summary()
+            with open(os.devnull, mode='w', encoding='utf-8') as sink:
+                registry.write_report("apartments", sink, "csv")
+            print(f"  обробників {workers}: {time.perf_counter() - start:.2f} с")
+
+
+def suite_cases(size, directory, seed=0):
+    # Готує синтетичні дані розміру size і повертає словник {назва випадку: функція без аргументів}.
+    # Кожна функція залишає дані в тому ж стані, тож її можна запускати повторно.
+    apartments = generate_apartments(size, seed)
+    residents = generate_residents(size, apartments, seed)
+    resident_manager = ResidentManager()
+    resident_manager.residents = residents
+    apartment_manager = ApartmentManager()
+    apartment_manager.apartments = apartments
+    storage = Storage(os.path.join(directory, "residents_data.csv"), os.path.join(directory, "apartments_data.csv"),
+                      resident_manager, apartment_manager)
+    reports = Reports()
+
+    rng = random.Random(seed)
+    batch = max(1, size // 10)  # Скільки записів додається і видаляється за один запуск
+    lookups = 1000  # Скільки пошуків виконується за один запуск
+    new_residents = [Resident(f"Новий мешканець {number}", 30, "") for number in range(batch)]
+    new_apartments = [Apartment(f"Н{number}", 1, 50.0, 2) for number in range(batch)]
+    numbers = [rng.choice(apartments).apartment_number for _ in range(lookups)]
+    names = [rng.choice(residents).full_name for _ in range(lookups)]
+    areas = [rng.choice(apartments).area for _ in range(100)]
+
+    def add_remove_residents():
+        for resident in new_residents:
+            resident_manager.add_resident(resident)
+        for resident in new_residents:
+            resident_manager.remove_resident(resident)
+
+    def add_remove_apartments():
+        for apartment in new_apartments:
+            apartment_manager.add_apartment(apartment, verbose=False)
+        for apartment in new_apartments:
+            apartment_manager.remove_apartment(apartment.apartment_number, verbose=False)
+
+    def save_csv():
+        storage.write_apartment_rows(map(Storage.apartment_row, apartments))
+        storage.write_resident_rows(map(Storage.resident_row, residents))
+
+    def write_reports(report, records, report_format):
+        with open(os.devnull, mode='w', encoding='utf-8') as sink:
+            reports.write_report(report(records, report_format), sink)
+
+    save_csv()
+    resident_manager.search_index  # Індекс пошуку будується заздалегідь, щоб вимірювати лише запити
+    return {
+        "residents.add_remove": add_remove_residents,
+        "residents.find_residents": lambda: [resident_manager.find_residents(name) for name in names],
+        "residents.search": lambda: [resident_manager.search_residents(name[:-1]) for name in names[:100]],
+        "apartments.add_remove": add_remove_apartments,
+        "apartments.get_apartment": lambda: [apartment_manager.get_apartment(number) for number in numbers],
+        "apartments.get_by_floor": lambda: [apartment_manager.get_apartments_by_floor(floor) for floor in range(1, 26)],
+        "apartments.get_by_num_rooms": lambda: [apartment_manager.get_apartments_by_num_rooms(rooms)
+                                                for rooms in range(1, 6)],
+        "apartments.get_by_area": lambda: [apartment_manager.get_apartments_by_area(area) for area in areas],
+        "apartments.find_range": lambda: apartment_manager.find_apartments(
+            floor=(3, 10), area=(50.0, 80.0), order_by="area", limit=50),
+        "apartments.vacant": apartment_manager.get_vacant_apartments,
+        "storage.save_csv": save_csv,
+        "storage.load_csv": storage.load_all,
+        "reports.residents_text": lambda: write_reports(reports.iter_residents_report, residents, "text"),
+        "reports.apartments_csv": lambda: write_reports(reports.iter_apartments_report, apartments, "csv"),
+    }
+
+
+def measure(function, repeat=3, memory=True):
+    # Повертає найкращий час з repeat запусків і пікову пам'ять, виділену під час окремого запуску під tracemalloc
+    gc.collect()
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def run_suite(sizes, repeat=3, memory=True, seed=0, cases=None, progress=None):
+    # Виконує всі випадки (або лише перелічені в cases) для кожного розміру; повертає список результатів
+    results = []
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        for size in sizes:
+            if memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            suite = suite_cases(size, directory, seed)
+            elapsed = time.perf_counter() - start
+            peak = None
+            if memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results.append({"case": "dataset.build", "size": size, "seconds": elapsed, "peak_bytes": peak})
+            if progress is not None:
+                progress(results[-1])
+            for name, function in suite.items():
+                if cases and name not in cases:
+                    continue
+                seconds, peak = measure(function, repeat, memory)
+                results.append({"case": name, "size": size, "seconds": seconds, "peak_bytes": peak})
+                if progress is not None:
+                    progress(results[-1])
+            del suite
+    return results
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.001, min_bytes=64 * 1024):
+    # Порівнює результати з базовими; повертає список описів регресій.
+    # Зміни, менші за min_seconds або min_bytes, вважаються шумом.
+    previous = {(result["case"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["case"], result["size"]))
+        if old is None:
+            continue
+        for metric, threshold in (("seconds", min_seconds), ("peak_bytes", min_bytes)):
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if new_value - old_value > threshold and new_value > old_value * (1 + tolerance):
+                regressions.append(f"{result['case']} [{result['size']}] {metric}: {old_value:.6g} -> {new_value:.6g} "
+                                   f"(+{(new_value / old_value - 1) * 100 if old_value else float('inf'):.0f}%)")
+    return regressions
+
+
+def print_result(result):
+    peak = f"{result['peak_bytes'] / 2 ** 20:9.2f} МіБ" if result["peak_bytes"] is not None else ""
+    print(f"  {result['case']:<28} {result['size']:>9} {result['seconds'] * 1000:12.3f} мс {peak}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Відтворюваний набір вимірювань продуктивності реєстру")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="кількість мешканців і квартир у синтетичних даних")
+    parser.add_argument("--repeat", type=int, default=3, help="кількість запусків кожного випадку (береться найкращий)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора синтетичних даних")
+    parser.add_argument("--cases", nargs="+", help="виконати лише вказані випадки")
+    parser.add_argument("--no-memory", action="store_true", help="не вимірювати пікову пам'ять")
+    parser.add_argument("--output", metavar="FILE", help="записати результати у JSON-файл")
+    parser.add_argument("--baseline", metavar="FILE", help="порівняти з базовими результатами з JSON-файлу")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустиме відносне погіршення (0.25 = 25%%)")
+    parser.add_argument("--demos", action="store_true", help="виконати окремі порівняльні демонстрації замість набору")
+    args = parser.parse_args(argv)
+
+    if args.demos:
+        bench_vacancy()
+        bench_load()
+        bench_streaming()
+        bench_memory()
+        bench_snapshot()
+        bench_buildings()
+        return 0
+
+    print(f"{'випадок':<30} {'розмір':>9} {'час':>15} {'пік пам.':>13}", file=sys.stderr)
+    results = run_suite(args.sizes, args.repeat, not args.no_memory, args.seed, args.cases, print_result)
+    report = {
+        "environment": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                        "machine": platform.machine(), "platform": platform.platform()},
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Регресія: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Регресій не виявлено.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from main import Apartment, ApartmentManager, Reports, Resident, ResidentManager, Storage, apartments_data_file, residents_data_file
+
+# Реєстр кількох будинків: кожен будинок - окремий підкаталог кореневого каталогу з власними файлами
+# residents_data.csv, apartments_data.csv і журналом змін. Функції рівня модуля нижче виконуються
+# в окремих процесах для одного будинку і повертають лише прості дані (рядки, числа, списки кортежів).
+
+
+def open_building(directory):
+    # Завантажує дані будинку (разом із журналом змін) у нові менеджери; повертає (менеджер мешканців, менеджер квартир).
+    # Файли будинку не змінюються: запити до реєстру лише читають дані.
+    resident_manager = ResidentManager()
+    apartment_manager = ApartmentManager()
+    storage = Storage(os.path.join(directory, residents_data_file), os.path.join(directory, apartments_data_file),
+                      resident_manager, apartment_manager)
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.load_data(read_only=True)
+    return resident_manager, apartment_manager
+
+
+def load_building(directory):
+    # Повертає дані будинку як рядки: {"apartments": [(номер, поверх, площа, кімнати)],
+    # "residents": [(П.І.Б., вік, телефон, номер квартири або "")]}
+    resident_manager, apartment_manager = open_building(directory)
+    return {
+        "apartments": [(a.apartment_number, a.floor, a.area, a.num_rooms) for a in apartment_manager.iter_apartments()],
+        "residents": [Storage.resident_row(resident) for resident in resident_manager.iter_residents()],
+    }
+
+
+def validate_building(directory):
+    # Перевіряє дані будинку в тому стані, який бачать користувачі: основні файли разом із журналом змін.
+    # Рядки файлів і записи журналу застосовуються так само, як при завантаженні, але без побудови менеджерів,
+    # тож зберігаються посилання мешканців на відсутні квартири і місце, звідки взявся кожен рядок.
+    # Файли не змінюються. Повертає список описів проблем (порожній, якщо проблем немає).
+    storage = Storage(os.path.join(directory, residents_data_file), os.path.join(directory, apartments_data_file),
+                      None, None)
+    journal_name = os.path.basename(storage.journal_file)
+    problems = []
+    apartments = {}  # Номер квартири -> (площа, кількість кімнат, місце рядка)
+    residents = {}  # П.І.Б. -> [(вік, номер квартири, місце рядка)]
+
+    try:
+        with open(storage.apartments_data_file, newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for line, row in enumerate(reader, start=2):
+                try:
+                    number, _, area, num_rooms, _ = Storage._parse_apartment_row(row)
+                except ValueError as e:
+                    problems.append(f"{apartments_data_file}:{line}: некоректний рядок ({e})")
+                    continue
+                if number in apartments:
+                    problems.append(f"{apartments_data_file}:{line}: квартира {number} повторюється")
+                apartments[number] = (area, num_rooms, f"{apartments_data_file}:{line}")
+    except FileNotFoundError:
+        problems.append(f"Файл {apartments_data_file} не знайдено.")
+
+    try:
+        with open(storage.residents_data_file, newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for line, row in enumerate(reader, start=2):
+                try:
+                    full_name, age, _, apartment_number = Storage._parse_resident_row(row)
+                except ValueError as e:
+                    problems.append(f"{residents_data_file}:{line}: некоректний рядок ({e})")
+                    continue
+                residents.setdefault(full_name, []).append((age, apartment_number, f"{residents_data_file}:{line}"))
+    except FileNotFoundError:
+        problems.append(f"Файл {residents_data_file} не знайдено.")
+
+    for line, (entry, _) in enumerate(storage.iter_journal(), start=1):
+        place = f"{journal_name}:{line}"
+        if entry is None:
+            problems.append(f"{place}: недописаний запис журналу (буде відкинутий при наступному збереженні)")
+            break
+        try:
+            if entry["op"] == "apartment":
+                if entry["row"] is None:
+                    apartments.pop(entry["apartment_number"], None)
+                else:
+                    _, area, num_rooms = entry["row"]
+                    apartments[entry["apartment_number"]] = (float(area), int(num_rooms), place)
+            elif entry["op"] == "residents":
+                residents[entry["full_name"]] = [(int(age), apartment_number, place)
+                                                 for age, _, apartment_number in entry["rows"]]
+            else:
+                problems.append(f"{place}: невідомий запис журналу {entry['op']}")
+        except (KeyError, TypeError, ValueError) as e:
+            problems.append(f"{place}: некоректний запис журналу ({e!r})")
+
+    for number, (area, num_rooms, place) in apartments.items():
+        if area <= 0 or num_rooms <= 0:
+            problems.append(f"{place}: квартира {number} має неможливі площу чи кількість кімнат")
+    for full_name, rows in residents.items():
+        for age, apartment_number, place in rows:
+            if not full_name:
+                problems.append(f"{place}: порожнє П.І.Б.")
+            if not 0 <= age <= 150:
+                problems.append(f"{place}: неможливий вік {age}")
+            if apartment_number and apartment_number not in apartments:
+                problems.append(f"{place}: квартира {apartment_number} не існує")
+    return problems
+
+
+def summarize_building(directory):
+    # Повертає зведення по будинку: кількість квартир, мешканців, заселених мешканців, вільних квартир і загальну площу
+    resident_manager, apartment_manager = open_building(directory)
+    residents = resident_manager.residents
+    return {
+        "apartments": len(apartment_manager.apartments),
+        "residents": len(residents),
+        "assigned": sum(1 for resident in residents if resident.apartment is not None),
+        "vacant": apartment_manager.vacancy_count(),
+        "total_area": sum(apartment.area for apartment in apartment_manager.iter_apartments()),
+    }
+
+
+def find_vacant_in_building(directory, conditions, limit=None):
+    # Вільні квартири будинку, що відповідають умовам find_apartments; повертає [(номер, поверх, площа, кімнати)]
+    _, apartment_manager = open_building(directory)
+    result = []
+    for apartment in apartment_manager.find_apartments(**conditions):
+        if not apartment.residents:
+            result.append((apartment.apartment_number, apartment.floor, apartment.area, apartment.num_rooms))
+            if limit is not None and len(result) >= limit:
+                break
+    return result
+
+
+def write_building_report(directory, name, kind, report_format, part_file):
+    # Записує частину спільного звіту для одного будинку у part_file.
+    # Для csv і jsonl кожен запис доповнюється назвою будинку, а заголовок csv не пишеться, а повертається.
+    # Повертає (заголовок або None, кількість записаних рядків).
+    resident_manager, apartment_manager = open_building(directory)
+    reports = Reports()
+    if kind == "residents":
+        lines = reports.iter_residents_report(resident_manager.iter_residents(), report_format)
+    else:
+        lines = reports.iter_apartments_report(apartment_manager.iter_apartments(), report_format)
+    header = None
+    count = 0
+    with open(part_file, mode='w', encoding='utf-8', newline='') as sink:
+        if report_format == "text":
+            sink.write(f"Будинок {name}\n")
+            count = 1 + reports.write_report(lines, sink)
+        elif report_format == "csv":
+            field = io.StringIO()
+            csv.writer(field, lineterminator="").writerow([name])
+            prefix = field.getvalue() + ","
+            header = "building," + next(lines)
+            count = reports.write_report((prefix + line for line in lines), sink)
+        else:
+            prefix = '{"building": ' + json.dumps(name, ensure_ascii=False) + ", "
+            count = reports.write_report((prefix + line[1:] for line in lines), sink)
+    return header, count
+
+
+class BuildingRegistry:
+    # Реєстр будинків у каталозі root. Завантаження, перевірка, зведення, пошук вільних квартир і звіти
+    # виконуються для всіх будинків паралельно в пулі процесів, а результати об'єднуються в порядку назв будинків.
+    def __init__(self, root, max_workers=None):
+        self.root = root  # Каталог з підкаталогами будинків
+        self.max_workers = max_workers or os.cpu_count() or 1  # Кількість процесів-обробників
+
+    def buildings(self):
+        # Назви будинків: підкаталоги, що містять файл квартир або мешканців
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, apartments_data_file))
+                      or os.path.isfile(os.path.join(self.root, name, residents_data_file)))
+
+    def directory(self, name):
+        return os.path.join(self.root, name)
+
+    def storage(self, name, resident_manager, apartment_manager):
+        # Сховище одного будинку для звичайної роботи з ним через менеджери
+        directory = self.directory(name)
+        os.makedirs(directory, exist_ok=True)
+        return Storage(os.path.join(directory, residents_data_file), os.path.join(directory, apartments_data_file),
+                       resident_manager, apartment_manager)
+
+    def import_building(self, name, residents_file, apartments_file):
+        # Додає будинок, копіюючи наявну пару CSV-файлів
+        directory = self.directory(name)
+        os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(apartments_file, os.path.join(directory, apartments_data_file))
+        shutil.copyfile(residents_file, os.path.join(directory, residents_data_file))
+
+    def map(self, function, *args, buildings=None):
+        # Виконує function(каталог будинку, *args) для кожного будинку; повертає список пар (назва, результат).
+        # Для одного будинку чи одного обробника виконується в поточному процесі без накладних витрат пулу.
+        names = self.buildings() if buildings is None else list(buildings)
+        directories = [self.directory(name) for name in names]
+        if self.max_workers == 1 or len(names) <= 1:
+            results = [function(directory, *args) for directory in directories]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+                results = list(executor.map(function, directories, *(repeat(arg) for arg in args)))
+        return list(zip(names, results))
+
+    def load(self):
+        # Паралельно читає дані всіх будинків і будує для кожного менеджери; повертає {назва: (мешканці, квартири)}
+        managers = {}
+        for name, data in self.map(load_building):
+            apartments = {row[0]: Apartment(*row) for row in data["apartments"]}
+            residents = []
+            for full_name, age, phone, apartment_number in data["residents"]:
+                resident = Resident(full_name, age, phone)
+                apartment = apartments.get(apartment_number)
+                if apartment is not None:
+                    resident.apartment = apartment
+                    apartment.residents.append(resident)
+                residents.append(resident)
+            resident_manager = ResidentManager()
+            resident_manager.residents = residents
+            apartment_manager = ApartmentManager()
+            apartment_manager.apartments = list(apartments.values())
+            managers[name] = (resident_manager, apartment_manager)
+        return managers
+
+    def validate(self):
+        # Повертає {назва будинку: список проблем} лише для будинків, у яких знайдено проблеми
+        return {name: problems for name, problems in self.map(validate_building) if problems}
+
+    def summary(self):
+        # Зведення по кожному будинку і підсумок по всіх будинках під ключем None
+        summaries = dict(self.map(summarize_building))
+        total = {"apartments": 0, "residents": 0, "assigned": 0, "vacant": 0, "total_area": 0.0}
+        for summary in summaries.values():
+            for key in total:
+                total[key] += summary[key]
+        summaries[None] = total
+        return summaries
+
+    def vacant_apartments(self, floor=None, num_rooms=None, area=None, limit=None):
+        # Вільні квартири всіх будинків з умовами як у ApartmentManager.find_apartments;
+        # повертає [(будинок, номер, поверх, площа, кімнати)] в порядку назв будинків
+        conditions = {"floor": floor, "num_rooms": num_rooms, "area": area}
+        result = []
+        for name, apartments in self.map(find_vacant_in_building, conditions, limit):
+            result.extend((name,) + apartment for apartment in apartments)
+        return result[:limit] if limit is not None else result
+
+    def write_report(self, kind, sink, report_format="text"):
+        # Будує звіт ("residents" або "apartments") по всіх будинках: частини пишуться паралельно
+        # у тимчасові файли, а потім послідовно копіюються в sink. Повертає кількість рядків звіту.
+        if kind not in ("residents", "apartments"):
+            raise ValueError(f"Невідомий тип звіту {kind}")
+        if report_format not in Reports.formats:
+            raise ValueError(f"Невідомий формат звіту {report_format}")
+        names = self.buildings()
+        with tempfile.TemporaryDirectory() as directory:
+            part_files = [os.path.join(directory, f"{index}.part") for index in range(len(names))]
+            if self.max_workers == 1 or len(names) <= 1:
+                parts = [write_building_report(self.directory(name), name, kind, report_format, part_file)
+                         for name, part_file in zip(names, part_files)]
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+                    parts = list(executor.map(write_building_report, [self.directory(name) for name in names], names,
+                                              repeat(kind), repeat(report_format), part_files))
+            count = 0
+            headers = [header for header, _ in parts if header is not None]
+            if headers:
+                sink.write(headers[0])
+                count += 1
+            for part_file, (_, lines) in zip(part_files, parts):
+                with open(part_file, encoding='utf-8', newline='') as part:
+                    shutil.copyfileobj(part, sink)
+                count += lines
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Облік мешканців і квартир кількох будинків")
+    parser.add_argument("root", help="каталог з підкаталогами будинків")
+    parser.add_argument("--workers", type=int, help="кількість процесів (за замовчуванням - кількість ядер)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="зведення по будинках")
+    commands.add_parser("validate", help="перевірити файли всіх будинків")
+    vacant = commands.add_parser("vacant", help="вільні квартири всіх будинків")
+    vacant.add_argument("--floor", type=int)
+    vacant.add_argument("--num-rooms", type=int)
+    vacant.add_argument("--limit", type=int)
+    report = commands.add_parser("report", help="спільний звіт по всіх будинках")
+    report.add_argument("kind", choices=("residents", "apartments"))
+    report.add_argument("--format", default="text", choices=Reports.formats)
+    report.add_argument("--output", metavar="FILE", help="файл звіту (за замовчуванням - вивести на екран)")
+    add = commands.add_parser("import", help="додати будинок з наявної пари CSV-файлів")
+    add.add_argument("name")
+    add.add_argument("--residents", default=residents_data_file)
+    add.add_argument("--apartments", default=apartments_data_file)
+    args = parser.parse_args()
+
+    registry = BuildingRegistry(args.root, args.workers)
+    if args.command == "summary":
+        for name, summary in registry.summary().items():
+            print(f"{name if name is not None else 'Усього'}: квартир {summary['apartments']}, "
+                  f"вільних {summary['vacant']}, мешканців {summary['residents']} "
+                  f"(заселено {summary['assigned']}), площа {summary['total_area']:.1f}")
+    elif args.command == "validate":
+        problems = registry.validate()
+        for name, messages in problems.items():
+            for message in messages:
+                print(f"{name}: {message}")
+        if problems:
+            sys.exit(1)
+        print("Проблем не знайдено.")
+    elif args.command == "vacant":
+        for name, number, floor, area, num_rooms in registry.vacant_apartments(args.floor, args.num_rooms,
+                                                                               limit=args.limit):
+            print(f"Будинок: {name}, Номер квартири: {number}, Поверх: {floor}, Площа: {area}, Кількість кімнат: {num_rooms}")
+    elif args.command == "report":
+        if args.output:
+            with open(args.output, mode='w', encoding='utf-8', newline='') as file:
+                count = registry.write_report(args.kind, file, args.format)
+            print(f"Звіт ({count} рядків) збережено у файлі {args.output}")
+        else:
+            registry.write_report(args.kind, sys.stdout, args.format)
+    else:
+        registry.import_building(args.name, args.residents, args.apartments)
+        print(f"Будинок {args.name} додано.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy потрібен лише для numpy_column
+    np = None
+
+
+class SlotResident:
+    # Компактний варіант Resident: атрибути зберігаються в __slots__ замість __dict__
+    __slots__ = ("full_name", "age", "phone", "apartment")
+
+    def __init__(self, full_name, age, phone):
+        self.full_name = full_name  # Повне ім'я мешканця
+        self.age = age  # Вік мешканця
+        self.phone = phone  # Номер телефону мешканця
+        self.apartment = None  # Квартира, в якій проживає мешканець
+
+    def __str__(self):
+        return resident_text(self)
+
+
+class SlotApartment:
+    # Компактний варіант Apartment: атрибути зберігаються в __slots__ замість __dict__
+    __slots__ = ("apartment_number", "floor", "area", "num_rooms", "residents")
+
+    def __init__(self, apartment_number, floor, area, num_rooms):
+        self.apartment_number = apartment_number  # Номер квартири
+        self.floor = floor  # Поверх, на якому розташована квартира
+        self.area = area  # Площа квартири
+        self.num_rooms = num_rooms  # Кількість кімнат
+        self.residents = []  # Список мешканців у квартирі
+
+    def __str__(self):
+        return apartment_text(self)
+
+
+def resident_text(resident):
+    # Текстове подання мешканця у тому ж форматі, що й Resident.__str__
+    if resident.apartment:
+        return f"П.І.Б.: {resident.full_name}, Вік: {resident.age}, Телефон: {resident.phone}, Проживає в квартирі {resident.apartment.apartment_number}"
+    return f"П.І.Б.: {resident.full_name}, Вік: {resident.age}, Телефон: {resident.phone}, Не заселений в жодну квартиру"
+
+
+def apartment_text(apartment):
+    # Текстове подання квартири у тому ж форматі, що й Apartment.__str__
+    residents = apartment.residents
+    if residents:
+        return f"Номер квартири: {apartment.apartment_number}, Поверх: {apartment.floor}, Площа: {apartment.area}, Кількість кімнат: {apartment.num_rooms}, Заселені мешканці: {', '.join(r.full_name for r in residents)}"
+    return f"Номер квартири: {apartment.apartment_number}, Поверх: {apartment.floor}, Площа: {apartment.area}, Кількість кімнат: {apartment.num_rooms}, Вільна"
+
+
+class ColumnarStore:
+    # Стовпцеве сховище квартир і мешканців: числові поля лежать у масивах array,
+    # а зв'язок мешканця з квартирою - це індекс квартири (-1, якщо мешканець не заселений).
+    # Доступ до окремих записів - через легкі об'єкти ApartmentView і ResidentView з тими ж атрибутами,
+    # що й у Apartment і Resident.
+    def __init__(self):
+        self.apartment_numbers = []  # Номери квартир
+        self.floors = array('i')  # Поверхи квартир
+        self.areas = array('d')  # Площі квартир
+        self.num_rooms = array('i')  # Кількість кімнат у квартирах
+        self.full_names = []  # П.І.Б. мешканців
+        self.ages = array('i')  # Вік мешканців
+        self.phones = []  # Телефони мешканців
+        self.resident_apartments = array('i')  # Індекс квартири кожного мешканця або -1
+        self._apartment_index = {}  # Номер квартири -> індекс квартири
+        self._offsets = None  # Зворотні зв'язки квартира -> мешканці (будуються за потреби)
+        self._members = None
+
+    @classmethod
+    def from_objects(cls, apartments, residents):
+        # Будує сховище зі списків квартир і мешканців (Apartment/Resident чи їх компактних варіантів)
+        store = cls()
+        for apartment in apartments:
+            store.add_apartment(apartment.apartment_number, apartment.floor, apartment.area, apartment.num_rooms)
+        for resident in residents:
+            apartment_number = resident.apartment.apartment_number if resident.apartment is not None else None
+            store.add_resident(resident.full_name, resident.age, resident.phone, apartment_number)
+        return store
+
+    @classmethod
+    def from_columns(cls, apartment_numbers, floors, areas, num_rooms, full_names, ages, phones, resident_apartments):
+        # Будує сховище з готових стовпців (списків і масивів array), не копіюючи їх
+        store = cls()
+        store.apartment_numbers, store.floors, store.areas, store.num_rooms = apartment_numbers, floors, areas, num_rooms
+        store.full_names, store.ages, store.phones, store.resident_apartments = full_names, ages, phones, resident_apartments
+        store._apartment_index = {number: index for index, number in enumerate(apartment_numbers)}
+        return store
+
+    def add_apartment(self, apartment_number, floor, area, num_rooms):
+        # Додає квартиру і повертає її індекс
+        index = len(self.apartment_numbers)
+        self._apartment_index[apartment_number] = index
+        self.apartment_numbers.append(apartment_number)
+        self.floors.append(floor)
+        self.areas.append(area)
+        self.num_rooms.append(num_rooms)
+        self._offsets = None
+        return index
+
+    def add_resident(self, full_name, age, phone, apartment_number=None):
+        # Додає мешканця і повертає його індекс; неіснуючий номер квартири означає "не заселений"
+        index = len(self.full_names)
+        self.full_names.append(full_name)
+        self.ages.append(age)
+        self.phones.append(phone)
+        self.resident_apartments.append(self._apartment_index.get(apartment_number, -1))
+        self._offsets = None
+        return index
+
+    def apartment_count(self):
+        return len(self.apartment_numbers)
+
+    def resident_count(self):
+        return len(self.full_names)
+
+    def apartment(self, index):
+        return ApartmentView(self, index)
+
+    def resident(self, index):
+        return ResidentView(self, index)
+
+    def get_apartment(self, apartment_number):
+        # Повертає квартиру за її номером або None
+        index = self._apartment_index.get(apartment_number)
+        return ApartmentView(self, index) if index is not None else None
+
+    @property
+    def apartments(self):
+        # Список квартир у вигляді ApartmentView
+        return [ApartmentView(self, index) for index in range(len(self.apartment_numbers))]
+
+    @property
+    def residents(self):
+        # Список мешканців у вигляді ResidentView
+        return [ResidentView(self, index) for index in range(len(self.full_names))]
+
+    def resident_indices(self, apartment_index):
+        # Повертає індекси мешканців квартири
+        if self._offsets is None:
+            self._build_reverse_links()
+        return self._members[self._offsets[apartment_index]:self._offsets[apartment_index + 1]]
+
+    def _build_reverse_links(self):
+        # Сортування підрахунком: мешканці групуються за квартирами за O(N + M)
+        counts = array('i', bytes(4 * (len(self.apartment_numbers) + 1)))
+        for apartment_index in self.resident_apartments:
+            if apartment_index >= 0:
+                counts[apartment_index + 1] += 1
+        for index in range(1, len(counts)):
+            counts[index] += counts[index - 1]
+        positions = array('i', counts)
+        members = array('i', bytes(4 * counts[-1]))
+        for resident_index, apartment_index in enumerate(self.resident_apartments):
+            if apartment_index >= 0:
+                members[positions[apartment_index]] = resident_index
+                positions[apartment_index] += 1
+        self._offsets, self._members = counts, members
+
+    def numpy_column(self, name):
+        # Повертає числовий стовпець (floors, areas, num_rooms, ages, resident_apartments) як масив NumPy без копіювання
+        if np is None:
+            raise ImportError("Для numpy_column потрібен пакет numpy")
+        column = getattr(self, name)
+        return np.frombuffer(column, dtype=np.int32 if column.typecode == 'i' else np.float64)
+
+
+class ApartmentView:
+    # Легке подання квартири зі сховища ColumnarStore з атрибутами Apartment
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    apartment_number = property(lambda self: self.store.apartment_numbers[self.index])
+    floor = property(lambda self: self.store.floors[self.index],
+                     lambda self, value: self.store.floors.__setitem__(self.index, value))
+    area = property(lambda self: self.store.areas[self.index],
+                    lambda self, value: self.store.areas.__setitem__(self.index, value))
+    num_rooms = property(lambda self: self.store.num_rooms[self.index],
+                         lambda self, value: self.store.num_rooms.__setitem__(self.index, value))
+
+    @property
+    def residents(self):
+        return [ResidentView(self.store, index) for index in self.store.resident_indices(self.index)]
+
+    def __eq__(self, other):
+        return isinstance(other, ApartmentView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __str__(self):
+        return apartment_text(self)
+
+
+class ResidentView:
+    # Легке подання мешканця зі сховища ColumnarStore з атрибутами Resident
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    full_name = property(lambda self: self.store.full_names[self.index])
+    age = property(lambda self: self.store.ages[self.index],
+                   lambda self, value: self.store.ages.__setitem__(self.index, value))
+    phone = property(lambda self: self.store.phones[self.index],
+                     lambda self, value: self.store.phones.__setitem__(self.index, value))
+
+    @property
+    def apartment(self):
+        apartment_index = self.store.resident_apartments[self.index]
+        return ApartmentView(self.store, apartment_index) if apartment_index >= 0 else None
+
+    @apartment.setter
+    def apartment(self, apartment):
+        self.store.resident_apartments[self.index] = apartment.index if apartment is not None else -1
+        self.store._offsets = None
+
+    def __eq__(self, other):
+        return isinstance(other, ResidentView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __str__(self):
+        return resident_text(self)
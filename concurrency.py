@@ -0,0 +1,120 @@
+import threading
+from contextlib import ExitStack, contextmanager
+
+from main import ResidentHandler
+
+
+class ConcurrentResidentHandler(ResidentHandler):
+    # Потокобезпечний варіант ResidentHandler для одночасної роботи кількох потоків з тими самими менеджерами.
+    # Заселення, виселення і видалення виконуються під замком мешканця та замками задіяних квартир (завжди
+    # в порядку номерів квартир, тож взаємоблокувань немає), а спільні індекси менеджерів - під окремим замком.
+    # Квартири і мешканців, з якими працюють ці методи, слід видаляти лише через remove_apartment і remove_resident.
+    def __init__(self, capacity_per_room=None):
+        self.capacity_per_room = capacity_per_room  # Скільки мешканців може припадати на кімнату (None - без обмежень)
+        self._guard = threading.Lock()  # Захищає словники замків
+        self._apartment_locks = {}  # Номер квартири -> [замок, кількість потоків, що його тримають чи чекають]
+        self._resident_locks = {}  # Мешканець -> [замок, кількість потоків, що його тримають чи чекають]
+        self.index_lock = threading.RLock()  # Захищає індекси менеджерів
+
+    @contextmanager
+    def _locked(self, locks, key):
+        # Тримає замок для key; запис про замок видаляється, щойно його ніхто не тримає і не чекає,
+        # тож словники замків не ростуть і не утримують видалених мешканців
+        with self._guard:
+            entry = locks.get(key)
+            if entry is None:
+                entry = locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del locks[key]
+
+    @contextmanager
+    def _locked_resident(self, resident, *apartments):
+        # Тримає замки мешканця, його поточної квартири і квартир apartments. Поточну квартиру може видалити
+        # remove_apartment, поки потік чекає на її замок, тож після захоплення замків вона перевіряється заново.
+        with self._locked(self._resident_locks, resident):
+            while True:
+                source = resident.apartment
+                numbers = {a.apartment_number for a in (source, *apartments) if a is not None}
+                with ExitStack() as stack:
+                    for number in sorted(numbers):
+                        stack.enter_context(self._locked(self._apartment_locks, number))
+                    if resident.apartment is source:
+                        yield source
+                        return
+
+    def capacity(self, apartment):
+        # Повертає максимальну кількість мешканців квартири або None, якщо обмеження немає
+        if self.capacity_per_room is None:
+            return None
+        return apartment.num_rooms * self.capacity_per_room
+
+    def assign(self, resident_manager, apartment_manager, full_name, apartment_number):
+        # Заселяє мешканця (або переселяє, якщо він уже живе в іншій квартирі); повертає (успіх, повідомлення)
+        with self.index_lock:
+            residents = resident_manager.find_residents(full_name)
+            apartment = apartment_manager.get_apartment(apartment_number)
+        if not residents or apartment is None:
+            return False, "Мешканця або квартиру не знайдено."
+        return self.move(apartment_manager, residents[0], apartment, resident_manager)
+
+    def evacuate(self, resident_manager, apartment_manager, full_name):
+        # Виселяє першого заселеного мешканця з вказаним П.І.Б.; повертає (успіх, повідомлення)
+        with self.index_lock:
+            residents = resident_manager.find_residents(full_name)
+        for resident in residents:
+            success, message = self.move(apartment_manager, resident, None, resident_manager)
+            if success:
+                return success, message
+        return False, "Мешканця не знайдено або він не проживає в квартирі."
+
+    def move(self, apartment_manager, resident, apartment, resident_manager=None):
+        # Атомарно виселяє мешканця з поточної квартири і заселяє в apartment (None - лише виселити).
+        # Якщо передано resident_manager, мешканець має бути в ньому зареєстрований.
+        with self._locked_resident(resident, apartment) as source:
+            with self.index_lock:
+                if resident_manager is not None and resident not in resident_manager.find_residents(resident.full_name):
+                    return False, f"Мешканця {resident.full_name} не знайдено."
+                if apartment is not None and apartment_manager.get_apartment(apartment.apartment_number) is not apartment:
+                    return False, f"Квартиру {apartment.apartment_number} не знайдено."
+            if apartment is None:
+                if source is None:
+                    return False, f"Мешканець {resident.full_name} не проживає в квартирі."
+                with self.index_lock:
+                    apartment_manager.move_out(resident)
+                return True, f"Мешканця {resident.full_name} виселено із квартири {source.apartment_number}."
+            if source is apartment:
+                return False, f"{resident.full_name} вже заселений в цю квартиру."
+            capacity = self.capacity(apartment)
+            if capacity is not None and len(apartment.residents) >= capacity:
+                return False, f"Квартира {apartment.apartment_number} заповнена."
+            with self.index_lock:
+                apartment_manager.move_in(resident, apartment)
+            return True, f"{resident.full_name} заселений в квартиру {apartment.apartment_number}."
+
+    def remove_apartment(self, apartment_manager, apartment_number):
+        # Видаляє квартиру, виселивши її мешканців; повертає (успіх, повідомлення)
+        with self._locked(self._apartment_locks, apartment_number), self.index_lock:
+            if apartment_manager.remove_apartment(apartment_number, verbose=False):
+                return True, f"Квартира {apartment_number} видалена."
+        return False, f"Квартира {apartment_number} не знайдена."
+
+    def remove_resident(self, resident_manager, apartment_manager, full_name):
+        # Виселяє і видаляє першого мешканця з вказаним П.І.Б.; повертає (успіх, повідомлення)
+        with self.index_lock:
+            residents = resident_manager.find_residents(full_name)
+        if not residents:
+            return False, "Мешканця не знайдено."
+        resident = residents[0]
+        with self._locked_resident(resident), self.index_lock:
+            if resident not in resident_manager.find_residents(full_name):
+                return False, "Мешканця не знайдено."
+            apartment_manager.move_out(resident)
+            resident_manager.remove_resident(resident)
+        return True, f"Мешканця {full_name} видалено."
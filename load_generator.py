@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote
+
+
+class HttpClient:
+    # Мінімальний HTTP/1.1 клієнт з постійним з'єднанням для запитів до RegistryServer
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def request(self, method, path, payload=None):
+        # Надсилає запит і повертає (код стану, розібрана JSON-відповідь)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n\r\n"
+                          .encode("utf-8") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+
+async def run_client(host, port, requests, apartment_numbers, write_ratio, latencies, seed):
+    # Один клієнт: читає квартири та заселяє і виселяє власного мешканця
+    rng = random.Random(seed)
+    client = HttpClient(host, port)
+    await client.connect()
+    full_name = f"Навантаження {seed}"
+    await client.request("POST", "/residents", {"full_name": full_name, "age": 30, "phone": ""})
+    try:
+        for _ in range(requests):
+            if rng.random() < write_ratio:
+                if rng.random() < 0.5:
+                    request = ("POST", "/assign", {"full_name": full_name, "apartment_number": rng.choice(apartment_numbers)})
+                else:
+                    request = ("POST", "/evacuate", {"full_name": full_name})
+            elif rng.random() < 0.5:
+                request = ("GET", f"/apartments/{quote(rng.choice(apartment_numbers))}", None)
+            else:
+                request = ("GET", f"/apartments?floor={rng.randint(1, 10)}&limit=20", None)
+            start = time.perf_counter()
+            await client.request(*request)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.request("DELETE", f"/residents?name={quote(full_name)}")
+        await client.close()
+
+
+async def run(host, port, connections, requests, write_ratio):
+    client = HttpClient(host, port)
+    await client.connect()
+    _, apartments = await client.request("GET", "/apartments?limit=1000")
+    await client.close()
+    apartment_numbers = [apartment["apartment_number"] for apartment in apartments]
+    if not apartment_numbers:
+        raise SystemExit("На сервері немає квартир для навантаження")
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, requests, apartment_numbers, write_ratio, latencies, seed)
+                           for seed in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"Запитів: {len(latencies)}, з'єднань: {connections}, час: {elapsed:.2f} с")
+    print(f"Пропускна здатність: {len(latencies) / elapsed:.0f} запитів/с")
+    print(f"Затримка p50: {latencies[len(latencies) // 2] * 1000:.2f} мс, "
+          f"p99: {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор навантаження для server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=50, help="кількість одночасних клієнтів")
+    parser.add_argument("--requests", type=int, default=200, help="кількість запитів від кожного клієнта")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="частка запитів, що змінюють дані")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.connections, args.requests, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
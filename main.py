@@ -1,4 +1,34 @@
+import argparse
+import bisect
 import csv
+import gc
+import heapq
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from operator import attrgetter
+
+from analytics import BuildingAnalytics
+from metrics import Metrics
+from search import ResidentSearchIndex
+from snapshot import Snapshot, write_snapshot
+
+
+@contextmanager
+def paused_gc():
+    # Вимикає циклічний збирач сміття на час масового створення об'єктів, які однаково залишаться живими:
+    # інакше збирач багато разів обходить усі щойно створені об'єкти
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
 
 class Resident:
     # Клас представляє мешканця будинку
@@ -24,131 +54,619 @@ class Apartment:
 
     def __str__(self):
         if self.residents:
-            resident_names = [resident.full_name for resident in self.residents]
-            return f"Номер квартири: {self.apartment_number}, Поверх: {self.floor}, Площа: {self.area}, Кількість кімнат: {self.num_rooms}, Заселені мешканці: {', '.join(resident_names)}"
+            resident_names = ', '.join(resident.full_name for resident in self.residents)
+            return f"Номер квартири: {self.apartment_number}, Поверх: {self.floor}, Площа: {self.area}, Кількість кімнат: {self.num_rooms}, Заселені мешканці: {resident_names}"
         return f"Номер квартири: {self.apartment_number}, Поверх: {self.floor}, Площа: {self.area}, Кількість кімнат: {self.num_rooms}, Вільна"
 
 class ResidentManager:
     # Клас виконує функцію роботи зі списком мешканців
     def __init__(self):
-        self.residents = []  # Список мешканців будинку
+        self._residents = {}  # Мешканці будинку (словник використовується як впорядкована множина)
+        self._residents_by_name = {}  # Індекс: П.І.Б. -> мешканці з таким П.І.Б.
+        self._dirty_names = {}  # П.І.Б. мешканців, змінених з моменту останнього збереження
+        self._search_index = None  # Індекс пошуку (будується під час першого пошуку і далі оновлюється)
+
+    @property
+    def residents(self):
+        # Список мешканців будинку
+        return list(self._residents)
+
+    @residents.setter
+    def residents(self, residents):
+        # Замінює всіх мешканців і перебудовує індекси
+        self._residents = {}
+        self._residents_by_name = {}
+        self._search_index = None
+        for resident in residents:
+            self._index_resident(resident)
+
+    def _index_resident(self, resident):
+        self._residents[resident] = None
+        self._residents_by_name.setdefault(resident.full_name, {})[resident] = None
+        if self._search_index is not None:
+            self._search_index.add(resident)
+
+    def _unindex_resident(self, resident):
+        del self._residents[resident]
+        same_name = self._residents_by_name[resident.full_name]
+        del same_name[resident]
+        if not same_name:
+            del self._residents_by_name[resident.full_name]
+        if self._search_index is not None:
+            self._search_index.remove(resident)
 
     def add_resident(self, resident):
         # Додає мешканця до списку мешканців
-        self.residents.append(resident)
+        if resident not in self._residents:
+            self._index_resident(resident)
+            self.mark_dirty(resident)
 
     def remove_resident(self, resident):
         # Видаляє мешканця зі списку мешканців
-        if resident in self.residents:
-            self.residents.remove(resident)
+        if resident in self._residents:
+            self._unindex_resident(resident)
+            self.mark_dirty(resident)
         else:
             print("Мешканець не знайдений")
 
+    def iter_residents(self):
+        # Перебирає мешканців без побудови копії списку
+        return iter(self._residents)
+
+    def find_residents(self, full_name):
+        # Повертає список мешканців з вказаним П.І.Б.
+        return list(self._residents_by_name.get(full_name, ()))
+
+    @property
+    def search_index(self):
+        # Індекс пошуку за префіксом, нечітким збігом і телефоном
+        if self._search_index is None:
+            self._search_index = ResidentSearchIndex(self._residents)
+        return self._search_index
+
+    def search_residents(self, text, limit=10):
+        # Повертає до limit мешканців, упорядкованих за схожістю до text (П.І.Б., його частина чи телефон)
+        return [resident for _, resident in self.search_index.search(text, limit)]
+
+    def suggest_names(self, full_name, limit=3):
+        # Повертає П.І.Б. мешканців, схожі на full_name. Підказки дає лише вже побудований індекс пошуку:
+        # будувати його заради повідомлення про помилку означало б затримати пакетну обробку чи відповіді сервера
+        # на час індексування всіх мешканців
+        if self._search_index is None:
+            return []
+        return self._search_index.suggest(full_name, limit)
+
+    def mark_dirty(self, resident):
+        # Позначає мешканця як змінений, щоб його було записано при наступному збереженні
+        self._dirty_names[resident.full_name] = None
+
+    def get_dirty(self):
+        # Повертає П.І.Б. мешканців, змінених з моменту останнього збереження
+        return list(self._dirty_names)
+
+    def clear_dirty(self):
+        self._dirty_names = {}
+
 
 class ApartmentManager:
     # Клас для роботи з об'єктами квартир
+    sortable_fields = ("apartment_number", "floor", "area", "num_rooms")  # Поля, за якими можна сортувати
+
     def __init__(self):
-        self.apartments = []  # Список доступних квартир
+        self._apartments = {}  # Індекс: номер квартири -> квартира
+        self._by_floor = {}  # Індекс: поверх -> {номер квартири: квартира}
+        self._by_num_rooms = {}  # Індекс: кількість кімнат -> {номер квартири: квартира}
+        self._area_keys = []  # Відсортовані площі квартир
+        self._area_numbers = []  # Номери квартир у порядку self._area_keys
+        self._area_stale = False  # Індекс площ потребує перебудови (після пакетних змін)
+        self._bulk_depth = 0  # Глибина вкладеності bulk()
+        self._vacant = {}  # Індекс зайнятості: номер квартири -> вільна квартира
+        self._occupied_by_floor = {}  # Кількість заселених квартир на кожному поверсі
+        self._occupied_by_num_rooms = {}  # Кількість заселених квартир за кількістю кімнат
+        self._dirty_apartments = {}  # Номери квартир, змінених з моменту останнього збереження
+        self._dirty_residents = {}  # Мешканці, яких заселено чи виселено з моменту останнього збереження
+
+    @property
+    def apartments(self):
+        # Список доступних квартир
+        return list(self._apartments.values())
+
+    @apartments.setter
+    def apartments(self, apartments):
+        # Замінює всі квартири і перебудовує індекси
+        self._apartments = {}
+        self._by_floor = {}
+        self._by_num_rooms = {}
+        self._vacant = {}
+        self._occupied_by_floor = {}
+        self._occupied_by_num_rooms = {}
+        for apartment in apartments:
+            self._apartments[apartment.apartment_number] = apartment
+            self._by_floor.setdefault(apartment.floor, {})[apartment.apartment_number] = apartment
+            self._by_num_rooms.setdefault(apartment.num_rooms, {})[apartment.apartment_number] = apartment
+            self._index_occupancy(apartment)
+        self._rebuild_area_index()
+
+    def _rebuild_area_index(self):
+        # Індекс площ будується одним сортуванням, а не вставками по одній
+        by_area = sorted((apartment.area, apartment.apartment_number) for apartment in self._apartments.values())
+        self._area_keys = [area for area, _ in by_area]
+        self._area_numbers = [number for _, number in by_area]
+        self._area_stale = False
+
+    @contextmanager
+    def bulk(self):
+        # Пакетний режим: відсортований індекс площ не оновлюється при кожній зміні,
+        # а перебудовується один раз при виході з блоку або при першому пошуку за площею
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth and self._area_stale:
+                self._rebuild_area_index()
+
+    def _index_apartment(self, apartment):
+        number = apartment.apartment_number
+        self._apartments[number] = apartment
+        self._by_floor.setdefault(apartment.floor, {})[number] = apartment
+        self._by_num_rooms.setdefault(apartment.num_rooms, {})[number] = apartment
+        if self._bulk_depth or self._area_stale:
+            self._area_stale = True
+        else:
+            position = bisect.bisect_right(self._area_keys, apartment.area)
+            self._area_keys.insert(position, apartment.area)
+            self._area_numbers.insert(position, number)
+        self._index_occupancy(apartment)
+
+    def _unindex_apartment(self, apartment):
+        number = apartment.apartment_number
+        del self._apartments[number]
+        self._remove_from_bucket(self._by_floor, apartment.floor, number)
+        self._remove_from_bucket(self._by_num_rooms, apartment.num_rooms, number)
+        if self._bulk_depth or self._area_stale:
+            self._area_stale = True
+        else:
+            start = bisect.bisect_left(self._area_keys, apartment.area)
+            end = bisect.bisect_right(self._area_keys, apartment.area)
+            position = self._area_numbers.index(number, start, end)
+            del self._area_keys[position]
+            del self._area_numbers[position]
+        self._unindex_occupancy(apartment)
+
+    @staticmethod
+    def _remove_from_bucket(buckets, key, number):
+        bucket = buckets[key]
+        del bucket[number]
+        if not bucket:
+            del buckets[key]
+
+    def _index_occupancy(self, apartment):
+        if apartment.residents:
+            self._occupied_by_floor[apartment.floor] = self._occupied_by_floor.get(apartment.floor, 0) + 1
+            self._occupied_by_num_rooms[apartment.num_rooms] = self._occupied_by_num_rooms.get(apartment.num_rooms, 0) + 1
+        else:
+            self._vacant[apartment.apartment_number] = apartment
+
+    def _unindex_occupancy(self, apartment):
+        if apartment.apartment_number in self._vacant:
+            del self._vacant[apartment.apartment_number]
+            return
+        for counts, key in ((self._occupied_by_floor, apartment.floor), (self._occupied_by_num_rooms, apartment.num_rooms)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def _is_registered(self, apartment):
+        return self._apartments.get(apartment.apartment_number) is apartment
+
+    def move_in(self, resident, apartment):
+        # Заселяє мешканця в квартиру і оновлює індекс зайнятості.
+        # Повертає False, якщо мешканець вже проживає в цій квартирі.
+        if resident.apartment is apartment and resident in apartment.residents:
+            return False
+        if resident.apartment is not None:
+            self.move_out(resident)
+        registered = self._is_registered(apartment)
+        if registered:
+            self._unindex_occupancy(apartment)
+        apartment.residents.append(resident)
+        resident.apartment = apartment
+        if registered:
+            self._index_occupancy(apartment)
+        self._dirty_residents[resident] = None
+        return True
 
-    def add_apartment(self, apartment):
+    def move_out(self, resident):
+        # Виселяє мешканця з його квартири і оновлює індекс зайнятості.
+        # Повертає квартиру, з якої виселено мешканця, або None.
+        apartment = resident.apartment
+        if apartment is None:
+            return None
+        registered = self._is_registered(apartment)
+        if registered:
+            self._unindex_occupancy(apartment)
+        if resident in apartment.residents:
+            apartment.residents.remove(resident)
+        resident.apartment = None
+        if registered:
+            self._index_occupancy(apartment)
+        self._dirty_residents[resident] = None
+        return apartment
+
+    def add_apartment(self, apartment, verbose=True):
         # Додає квартиру до списку доступних квартир
-        self.apartments.append(apartment)
-        print(f"Квартира {apartment.apartment_number} додана.")
+        if apartment.apartment_number in self._apartments:
+            if verbose:
+                print(f"Квартира {apartment.apartment_number} вже існує.")
+            return False
+        self._index_apartment(apartment)
+        self.mark_dirty(apartment)
+        if verbose:
+            print(f"Квартира {apartment.apartment_number} додана.")
+        return True
 
-    def remove_apartment(self, apartment_number):
+    def remove_apartment(self, apartment_number, verbose=True):
         # Видаляє квартиру за її номером
-        for apartment in self.apartments:
-            if apartment.apartment_number == apartment_number:
-                self.apartments.remove(apartment)
+        apartment = self._apartments.get(apartment_number)
+        if apartment is not None:
+            # Мешканці виселяються (і позначаються зміненими), щоб не залишитися прив'язаними до видаленої квартири
+            for resident in list(apartment.residents):
+                self.move_out(resident)
+            self._unindex_apartment(apartment)
+            self.mark_dirty(apartment)
+            if verbose:
                 print(f"Квартира {apartment_number} видалена.")
-                break
-        else:
+            return True
+        if verbose:
             print(f"Квартира {apartment_number} не знайдена.")
+        return False
+
+    def update_apartment(self, apartment_number, floor, area, num_rooms):
+        # Змінює параметри квартири, зберігаючи її мешканців, і оновлює індекси
+        apartment = self._apartments.get(apartment_number)
+        if apartment is None:
+            return False
+        self._unindex_apartment(apartment)
+        apartment.floor, apartment.area, apartment.num_rooms = floor, area, num_rooms
+        self._index_apartment(apartment)
+        self.mark_dirty(apartment)
+        return True
+
+    def mark_dirty(self, apartment):
+        # Позначає квартиру як змінену, щоб її було записано при наступному збереженні
+        self._dirty_apartments[apartment.apartment_number] = None
+
+    def get_dirty(self):
+        # Повертає номери змінених квартир і мешканців, яких заселено чи виселено, з моменту останнього збереження
+        return list(self._dirty_apartments), list(self._dirty_residents)
+
+    def clear_dirty(self):
+        self._dirty_apartments = {}
+        self._dirty_residents = {}
+
+    def get_apartment(self, apartment_number):
+        # Повертає квартиру за її номером або None
+        return self._apartments.get(apartment_number)
+
+    def iter_apartments(self):
+        # Перебирає квартири без побудови копії списку
+        return iter(self._apartments.values())
 
     def get_apartments_by_num_rooms(self, num_rooms):
         # Повертає список квартир з вказаною кількістю кімнат
-        return [apartment for apartment in self.apartments if apartment.num_rooms == num_rooms]
+        return list(self._by_num_rooms.get(num_rooms, {}).values())
 
     def get_apartments_by_floor(self, floor):
         # Повертає список квартир на вказаному поверсі
-        return [apartment for apartment in self.apartments if apartment.floor == floor]
+        return list(self._by_floor.get(floor, {}).values())
 
     def get_apartments_by_area(self, area):
         # Повертає список квартир з вказаною площею
-        return [apartment for apartment in self.apartments if apartment.area == area]
+        return self.find_apartments(area=area)
 
     def get_vacant_apartments(self):
         # Повертає список вільних квартир (без мешканців)
-        return [apartment for apartment in self.apartments if not apartment.residents]
+        return list(self._vacant.values())
+
+    def vacancy_count(self):
+        # Повертає кількість вільних квартир
+        return len(self._vacant)
+
+    def occupancy_rate_by_floor(self):
+        # Повертає частку заселених квартир на кожному поверсі
+        return {floor: self._occupied_by_floor.get(floor, 0) / len(bucket) for floor, bucket in self._by_floor.items()}
+
+    def occupancy_rate_by_num_rooms(self):
+        # Повертає частку заселених квартир для кожної кількості кімнат
+        return {num_rooms: self._occupied_by_num_rooms.get(num_rooms, 0) / len(bucket)
+                for num_rooms, bucket in self._by_num_rooms.items()}
+
+    def find_apartments(self, floor=None, num_rooms=None, area=None, order_by=None, descending=False,
+                        limit=None, offset=0):
+        # Повертає квартири, що задовольняють усім умовам одночасно.
+        # Кожна умова - це точне значення або діапазон (від, до), де None означає відкриту межу,
+        # наприклад floor=(3, None) - "поверх >= 3", area=(45, 60) - "площа від 45 до 60".
+        conditions = {}
+        for field, value in (("floor", floor), ("num_rooms", num_rooms), ("area", area)):
+            if value is not None:
+                conditions[field] = value if isinstance(value, (tuple, list)) else (value, value)
+        if order_by is not None and order_by not in self.sortable_fields:
+            raise ValueError(f"Неможливо сортувати за полем {order_by}")
+
+        candidates, indexed_field, sorted_by_area = self._select_candidates(conditions)
+        checks = [(attrgetter(field), low, high) for field, (low, high) in conditions.items()
+                  if field != indexed_field]
+        if checks:
+            candidates = (apartment for apartment in candidates
+                          if all(self._in_range(get(apartment), low, high) for get, low, high in checks))
+
+        if order_by is not None and not (order_by == "area" and sorted_by_area and not descending):
+            key = attrgetter(order_by)
+            if limit is not None:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                candidates = select(offset + limit, candidates, key=key)
+            else:
+                candidates = sorted(candidates, key=key, reverse=descending)
+        end = offset + limit if limit is not None else None
+        return list(islice(candidates, offset, end))
+
+    def _select_candidates(self, conditions):
+        # Обирає найвужчий індекс для умов і повертає (кандидати, поле індексу, чи відсортовані за площею)
+        best = (len(self._apartments), None, None)
+        if "area" in conditions:
+            if self._area_stale:
+                self._rebuild_area_index()
+            start, end = self._area_bounds(*conditions["area"])
+            best = min(best, (end - start, "area", (start, end)), key=lambda option: option[0])
+        for field, buckets in (("floor", self._by_floor), ("num_rooms", self._by_num_rooms)):
+            if field in conditions:
+                low, high = conditions[field]
+                keys = [key for key in buckets if self._in_range(key, low, high)]
+                size = sum(len(buckets[key]) for key in keys)
+                best = min(best, (size, field, keys), key=lambda option: option[0])
+
+        _, field, selection = best
+        if field is None:
+            return iter(self._apartments.values()), None, False
+        if field == "area":
+            start, end = selection
+            numbers = islice(self._area_numbers, start, end)
+            return (self._apartments[number] for number in numbers), "area", True
+        buckets = self._by_floor if field == "floor" else self._by_num_rooms
+        return (apartment for key in sorted(selection) for apartment in buckets[key].values()), field, False
+
+    def _area_bounds(self, low, high):
+        start = 0 if low is None else bisect.bisect_left(self._area_keys, low)
+        end = len(self._area_keys) if high is None else bisect.bisect_right(self._area_keys, high)
+        return start, max(start, end)
+
+    @staticmethod
+    def _in_range(value, low, high):
+        return (low is None or value >= low) and (high is None or value <= high)
 
 
 class ResidentHandler:
     # Клас виконує функції заселення\виселення
-    def assign_resident_to_apartment(self, resident_manager, apartment_manager):
-        full_name = input("Введіть П.І.Б. мешканця, якого ви хочете заселити: ")
-        apartment_number = input("Введіть номер квартири, в яку заселити: ")
+    def assign_resident_to_apartment(self, resident_manager, apartment_manager, full_name=None, apartment_number=None):
+        # Значення, що не передані як аргументи, запитуються у користувача
+        if full_name is None:
+            full_name = input("Введіть П.І.Б. мешканця, якого ви хочете заселити: ")
+        if apartment_number is None:
+            apartment_number = input("Введіть номер квартири, в яку заселити: ")
+        success, message = self.assign(resident_manager, apartment_manager, full_name, apartment_number)
+        print(message)
+        return success
+
+    def evacuate_resident_from_apartment(self, resident_manager, apartment_manager, full_name=None):
+        # Якщо П.І.Б. не передано, воно запитується у користувача
+        if full_name is None:
+            full_name = input("Введіть П.І.Б. мешканця: ")
+        success, message = self.evacuate(resident_manager, apartment_manager, full_name)
+        print(message)
+        return success
 
-        resident = next((r for r in resident_manager.residents if r.full_name == full_name), None)
-        apartment = next((a for a in apartment_manager.apartments if a.apartment_number == apartment_number), None)
+    def assign(self, resident_manager, apartment_manager, full_name, apartment_number):
+        # Заселяє мешканця без введення з клавіатури; повертає (успіх, повідомлення)
+        residents = resident_manager.find_residents(full_name)
+        resident = residents[0] if residents else None
+        apartment = apartment_manager.get_apartment(apartment_number)
 
         if resident and apartment:
-            if resident not in apartment.residents:
-                apartment.residents.append(resident)
-                resident.apartment = apartment
-                print(f"{resident.full_name} заселений в квартиру {apartment.apartment_number}.")
-            else:
-                print(f"{resident.full_name} вже заселений в цю квартиру.")
-        else:
-            print("Мешканця або квартиру не знайдено.")
+            if apartment_manager.move_in(resident, apartment):
+                return True, f"{resident.full_name} заселений в квартиру {apartment.apartment_number}."
+            return False, f"{resident.full_name} вже заселений в цю квартиру."
+        if not resident:
+            return False, "Мешканця не знайдено." + self.suggestion(resident_manager, full_name)
+        return False, "Квартиру не знайдено."
 
-    def evacuate_resident_from_apartment(self, resident_manager, apartment_manager):
-        full_name = input("Введіть П.І.Б. мешканця: ")
-        for resident in resident_manager.residents:
-            if resident.full_name == full_name:
-                if resident.apartment:
-                    apartment_number = resident.apartment.apartment_number
-                    resident.apartment = None
-                    print(f"Мешканця {full_name} виселено із квартири {apartment_number}.")
-                    return
-        print("Мешканця не знайдено або він не проживає в квартирі.")
+    def evacuate(self, resident_manager, apartment_manager, full_name):
+        # Виселяє мешканця без введення з клавіатури; повертає (успіх, повідомлення)
+        for resident in resident_manager.find_residents(full_name):
+            if resident.apartment:
+                apartment_number = apartment_manager.move_out(resident).apartment_number
+                return True, f"Мешканця {full_name} виселено із квартири {apartment_number}."
+        if not resident_manager.find_residents(full_name):
+            return False, "Мешканця не знайдено." + self.suggestion(resident_manager, full_name)
+        return False, "Мешканець не проживає в квартирі."
+
+    @staticmethod
+    def suggestion(resident_manager, full_name):
+        # Підказка зі схожими П.І.Б. для повідомлення про ненайденого мешканця (порожня, якщо схожих немає)
+        names = resident_manager.suggest_names(full_name)
+        return f" Можливо, ви мали на увазі: {', '.join(names)}?" if names else ""
 
 
 class Reports:
+    # Клас генерує звіти потоково: рядки звіту віддаються по одному, тож звіт не тримається в пам'яті цілком
+    formats = ("text", "csv", "jsonl")  # Підтримувані формати звітів
+
     def generate_full_residents_report(self, residents):
         # Генерує звіт про всіх мешканців
-        report = "Звіт про мешканців:\n"
-        for resident in residents:
-            report += str(resident) + "\n"
-        return report
+        return "".join(self.iter_residents_report(residents))
 
     def generate_full_apartments_report(self, apartments):
         # Генерує звіт про всі квартири
-        report = "Звіт про квартири:\n"
-        for apartment in apartments:
-            report += str(apartment) + "\n"
-        return report
+        return "".join(self.iter_apartments_report(apartments))
+
+    def iter_residents_report(self, residents, report_format="text", page=None, page_size=None):
+        # Генератор рядків звіту про мешканців; page нумерується з 1
+        return self._iter_report(residents, report_format, page, page_size, "Звіт про мешканців:",
+                                 Storage.residents_header, Storage.resident_row)
+
+    def iter_apartments_report(self, apartments, report_format="text", page=None, page_size=None):
+        # Генератор рядків звіту про квартири; page нумерується з 1
+        return self._iter_report(apartments, report_format, page, page_size, "Звіт про квартири:",
+                                 Storage.apartments_header, Storage.apartment_row)
+
+    def write_report(self, lines, sink):
+        # Записує рядки звіту у файлоподібний об'єкт і повертає кількість рядків
+        count = 0
+        for line in lines:
+            sink.write(line)
+            count += 1
+        return count
+
+    def _iter_report(self, records, report_format, page, page_size, title, header, to_row):
+        if report_format not in self.formats:
+            raise ValueError(f"Невідомий формат звіту {report_format}")
+        if page is not None:
+            page_size = page_size or 20
+            records = islice(records, (page - 1) * page_size, page * page_size)
+        if report_format == "text":
+            yield title + "\n"
+            for record in records:
+                yield str(record) + "\n"
+        elif report_format == "csv":
+            line = _LineBuffer()
+            writer = csv.writer(line, lineterminator="\n")
+            writer.writerow(header)
+            yield line.pop()
+            for record in records:
+                writer.writerow(to_row(record))
+                yield line.pop()
+        else:
+            for record in records:
+                yield json.dumps(dict(zip(header, to_row(record))), ensure_ascii=False) + "\n"
+
+
+class _LineBuffer:
+    # Приймає вивід csv.writer і віддає його по одному рядку
+    def __init__(self):
+        self.value = ""
+
+    def write(self, text):
+        self.value += text
+
+    def pop(self):
+        value, self.value = self.value, ""
+        return value
 
 
 class Storage:
     # Клас для роботи з системою загрузки даних
-    def __init__(self, residents_data_file, apartments_data_file, resident_manager, apartment_manager):
+    residents_header = ["full_name", "age", "phone", "apartment"]
+    apartments_header = ["apartment_number", "floor", "area", "num_rooms", "residents"]
+    chunk_size = 10_000  # Кількість рядків в одному пакеті при потоковому читанні та записі
+    buffer_size = 1 << 20  # Розмір буфера файлу при потоковому читанні та записі
+    compact_threshold = 10_000  # Кількість записів журналу, після якої журнал переноситься в основні файли
+
+    def __init__(self, residents_data_file, apartments_data_file, resident_manager, apartment_manager,
+                 journal_file=None):
         self.residents_data_file = residents_data_file  # Ім'я файлу для збереження даних про мешканців
         self.apartments_data_file = apartments_data_file  # Ім'я файлу для збереження даних про квартири
         self.resident_manager = resident_manager  # Менеджер мешканців
         self.apartment_manager = apartment_manager  # Менеджер квартир
+        # Журнал змін, що дописуються між повними збереженнями
+        self.journal_file = journal_file or os.path.join(os.path.dirname(residents_data_file), "changes_journal.jsonl")
+        self.journal_entries = 0  # Кількість записів у журналі змін
+        self._needs_compact = False  # Чи не вдалося останнє збереження (тоді наступне переписує файли повністю)
 
-    def save_residents(self, residents):
-        # Зберігає дані про мешканців у файл
+    @staticmethod
+    def resident_row(resident):
+        # Перетворює мешканця на рядок CSV
+        apartment_number = resident.apartment.apartment_number if resident.apartment is not None else ""
+        return resident.full_name, resident.age, resident.phone, apartment_number
+
+    @staticmethod
+    def apartment_row(apartment):
+        # Перетворює квартиру на рядок CSV
+        resident_names = ', '.join(r.full_name for r in apartment.residents)
+        return apartment.apartment_number, apartment.floor, apartment.area, apartment.num_rooms, resident_names
+
+    def iter_resident_rows(self, chunk_size=None, progress=None):
+        # Потоково читає файл мешканців пакетами рядків (full_name, age, phone, apartment_number)
+        return self._read_chunks(self.residents_data_file, self._parse_resident_row, chunk_size, progress)
+
+    def iter_apartment_rows(self, chunk_size=None, progress=None):
+        # Потоково читає файл квартир пакетами рядків (apartment_number, floor, area, num_rooms, resident_names)
+        return self._read_chunks(self.apartments_data_file, self._parse_apartment_row, chunk_size, progress)
+
+    def write_resident_rows(self, rows, chunk_size=None, progress=None):
+        # Потоково записує рядки мешканців у файл пакетами; повертає кількість записаних рядків
+        return self._write_chunks(self.residents_data_file, self.residents_header, rows, chunk_size, progress)
+
+    def write_apartment_rows(self, rows, chunk_size=None, progress=None):
+        # Потоково записує рядки квартир у файл пакетами; повертає кількість записаних рядків
+        return self._write_chunks(self.apartments_data_file, self.apartments_header, rows, chunk_size, progress)
+
+    @staticmethod
+    def _parse_resident_row(row):
+        full_name, age, phone, apartment_number = row
+        return full_name, int(age), phone, apartment_number
+
+    @staticmethod
+    def _parse_apartment_row(row):
+        apartment_number, floor, area, num_rooms, resident_names = row
+        return apartment_number, int(floor), float(area), int(num_rooms), resident_names
+
+    def _read_chunks(self, file_name, parse, chunk_size, progress):
+        # Генератор пакетів розібраних рядків; в пам'яті одночасно тримається лише один пакет
+        chunk_size = chunk_size or self.chunk_size
+        with open(file_name, mode='r', newline='', buffering=self.buffer_size) as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            done = 0
+            while True:
+                chunk = [parse(row) for row in islice(reader, chunk_size)]
+                if not chunk:
+                    break
+                done += len(chunk)
+                if progress is not None:
+                    progress(file_name, done)
+                yield chunk
+
+    def _write_chunks(self, file_name, header, rows, chunk_size, progress):
+        # Записує у тимчасовий файл і атомарно підміняє ним основний, тож збій не залишає обрізаний файл
+        chunk_size = chunk_size or self.chunk_size
+        rows = iter(rows)
+        done = 0
+        temp_file_name = file_name + ".tmp"
         try:
-            with open(self.residents_data_file, mode='w', newline='') as file:
+            with open(temp_file_name, mode='w', newline='', buffering=self.buffer_size) as file:
                 writer = csv.writer(file)
-                writer.writerow(["full_name", "age", "phone", "apartment"])
-                for resident in residents:
-                    if resident.apartment is not None:
-                        apartment_number = resident.apartment.apartment_number
-                    else:
-                        apartment_number = ""
-                    writer.writerow([resident.full_name, resident.age, resident.phone, apartment_number])
+                writer.writerow(header)
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    writer.writerows(chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(file_name, done)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_file_name, file_name)
+        except BaseException:
+            if os.path.exists(temp_file_name):
+                os.remove(temp_file_name)
+            raise
+        return done
+
+    def save_residents(self, residents, progress=None):
+        # Зберігає дані про мешканців у файл
+        try:
+            self.write_resident_rows(map(self.resident_row, residents), progress=progress)
             print(f"Дані про мешканців збережено у файлі {self.residents_data_file}")
         except Exception as e:
             print(f"Помилка збереження даних про мешканців: {e}")
@@ -156,21 +674,17 @@ class Storage:
     def load_residents(self):
         # Завантажує дані про мешканців з файлу
         try:
-            with open(self.residents_data_file, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)
-                residents = []
-                for row in reader:
-                    full_name, age, phone, apartment_number = row
-                    residents.append(Resident(full_name, int(age), phone))
+            residents = []
+            for chunk in self.iter_resident_rows():
+                for full_name, age, phone, apartment_number in chunk:
+                    resident = Resident(full_name, age, phone)
                     if apartment_number:
-                        apartment = next(
-                            (a for a in self.apartment_manager.apartments if a.apartment_number == apartment_number),
-                            None)
+                        apartment = self.apartment_manager.get_apartment(apartment_number)
                         if apartment:
-                            residents[-1].apartment = apartment
-                return residents
+                            resident.apartment = apartment
+                    residents.append(resident)
             print(f"Дані про мешканців завантажено з файлу {self.residents_data_file}")
+            return residents
         except FileNotFoundError:
             print(f"Файл {self.residents_data_file} не знайдено.")
             return []
@@ -178,15 +692,10 @@ class Storage:
             print(f"Помилка завантаження даних про мешканців: {e}")
             return []
 
-    def save_apartments(self, apartments):
+    def save_apartments(self, apartments, progress=None):
         # Зберігає дані про квартири у файл
         try:
-            with open(self.apartments_data_file, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(["apartment_number", "floor", "area", "num_rooms", "residents"])
-                for apartment in apartments:
-                    resident_names = ', '.join([r.full_name for r in apartment.residents])
-                    writer.writerow([apartment.apartment_number, apartment.floor, apartment.area, apartment.num_rooms, resident_names])
+            self.write_apartment_rows(map(self.apartment_row, apartments), progress=progress)
             print(f"Дані про квартири збережено у файлі {self.apartments_data_file}")
         except Exception as e:
             print(f"Помилка збереження даних про квартири: {e}")
@@ -194,20 +703,16 @@ class Storage:
     def load_apartments(self):
         # Завантажує дані про квартири з файлу
         try:
-            with open(self.apartments_data_file, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)
-                apartments = []
-                for row in reader:
-                    apartment_number, floor, area, num_rooms, resident_names = row
-                    apartment = Apartment(apartment_number, int(floor), float(area), int(num_rooms))
+            apartments = []
+            for chunk in self.iter_apartment_rows():
+                for apartment_number, floor, area, num_rooms, resident_names in chunk:
+                    apartment = Apartment(apartment_number, floor, area, num_rooms)
                     if resident_names:
-                        resident_names = resident_names.split(', ')
-                        residents_in_apartment = [resident for resident in self.resident_manager.residents if resident.full_name in resident_names]
-                        apartment.residents = residents_in_apartment
+                        apartment.residents = [resident for name in resident_names.split(', ')
+                                               for resident in self.resident_manager.find_residents(name)]
                     apartments.append(apartment)
-                return apartments
             print(f"Дані про квартири завантажено з файлу {self.apartments_data_file}")
+            return apartments
         except FileNotFoundError:
             print(f"Файл {self.apartments_data_file} не знайдено.")
             return []
@@ -215,13 +720,475 @@ class Storage:
             print(f"Помилка завантаження даних про квартири: {e}")
             return []
 
+    def load_all(self, progress=None):
+        # Завантажує квартири і мешканців за один прохід по кожному файлу та зв'язує їх через словник номерів.
+        # Повертає узгоджений знімок (мешканці, квартири), не залежний від поточного стану менеджерів.
+        # Джерелом зв'язків є стовпець apartment у файлі мешканців, стовпець residents у файлі квартир дублює його.
+        with paused_gc():
+            return self._load_all(progress)
+
+    def _load_all(self, progress):
+        apartments = {}
+        try:
+            for chunk in self.iter_apartment_rows(progress=progress):
+                for apartment_number, floor, area, num_rooms, _ in chunk:
+                    apartments[apartment_number] = Apartment(apartment_number, floor, area, num_rooms)
+            print(f"Дані про квартири завантажено з файлу {self.apartments_data_file}")
+        except FileNotFoundError:
+            print(f"Файл {self.apartments_data_file} не знайдено.")
+        except Exception as e:
+            print(f"Помилка завантаження даних про квартири: {e}")
+            apartments = {}
+
+        residents = []
+        try:
+            for chunk in self.iter_resident_rows(progress=progress):
+                for full_name, age, phone, apartment_number in chunk:
+                    resident = Resident(full_name, age, phone)
+                    apartment = apartments.get(apartment_number) if apartment_number else None
+                    if apartment is not None:
+                        resident.apartment = apartment
+                        apartment.residents.append(resident)
+                    residents.append(resident)
+            print(f"Дані про мешканців завантажено з файлу {self.residents_data_file}")
+        except FileNotFoundError:
+            print(f"Файл {self.residents_data_file} не знайдено.")
+        except Exception as e:
+            print(f"Помилка завантаження даних про мешканців: {e}")
+            residents = []
+            for apartment in apartments.values():
+                apartment.residents = []
+
+        return residents, list(apartments.values())
+
+    def save_snapshot(self, file_name):
+        # Зберігає поточний стан менеджерів у двійковий знімок
+        try:
+            write_snapshot(file_name, self.apartment_manager.iter_apartments(), self.resident_manager.iter_residents())
+            print(f"Знімок даних збережено у файлі {file_name}")
+        except Exception as e:
+            print(f"Помилка збереження знімка даних: {e}")
+
+    def load_snapshot(self, file_name):
+        # Завантажує мешканців і квартири з двійкового знімка; повертає (мешканці, квартири), як load_all
+        try:
+            return self._read_snapshot(file_name)
+        except FileNotFoundError:
+            print(f"Файл {file_name} не знайдено.")
+            return [], []
+        except Exception as e:
+            print(f"Помилка завантаження знімка даних: {e}")
+            return [], []
+
+    def load_data_from_snapshot(self, file_name):
+        # Завантажує знімок у менеджери замість основних файлів; повертає, чи вдалося завантаження.
+        # Якщо знімок прочитати не вдалося, менеджери не змінюються. Основні файли і журнал стану знімка
+        # не відповідають, тож наступне збереження перепише файли повністю.
+        try:
+            residents, apartments = self._read_snapshot(file_name)
+        except FileNotFoundError:
+            print(f"Файл {file_name} не знайдено.")
+            return False
+        except Exception as e:
+            print(f"Помилка завантаження знімка даних: {e}")
+            return False
+        self.apartment_manager.apartments = apartments
+        self.resident_manager.residents = residents
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+        self._needs_compact = True
+        return True
+
+    def _read_snapshot(self, file_name):
+        with Snapshot(file_name) as snapshot, paused_gc():
+            table = snapshot.strings()
+            apartments = [Apartment(table[number], floor, area, num_rooms) for number, floor, area, num_rooms in
+                          zip(snapshot.apartment_numbers, snapshot.floors, snapshot.areas, snapshot.num_rooms)]
+            residents = []
+            for name, age, phone, apartment_index in zip(snapshot.full_names, snapshot.ages, snapshot.phones,
+                                                         snapshot.resident_apartments):
+                resident = Resident(table[name], age, table[phone])
+                if apartment_index >= 0:
+                    apartment = apartments[apartment_index]
+                    resident.apartment = apartment
+                    apartment.residents.append(resident)
+                residents.append(resident)
+        print(f"Знімок даних завантажено з файлу {file_name}")
+        return residents, apartments
+
+    def load_data(self, read_only=False):
+        # Завантажує основні файли в менеджери і застосовує до них журнал змін.
+        # При read_only файли не змінюються (див. replay_journal) - для запитів, що лише читають дані.
+        residents, apartments = self.load_all()
+        self.apartment_manager.apartments = apartments
+        self.resident_manager.residents = residents
+        self.replay_journal(read_only)
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+
+    def save_changes(self):
+        # Дописує в журнал лише квартири та мешканців, змінених з моменту останнього збереження
+        self.prepare_save()()
+
+    def compact(self):
+        # Переписує основні файли поточним станом менеджерів і очищає журнал змін
+        self.prepare_compact()()
+
+    def prepare_save(self):
+        # Збирає зміни з менеджерів і знімає позначки змін, не звертаючись до файлів.
+        # Повертає функцію без аргументів, що записує зібране; її можна виконати в іншому потоці,
+        # поки менеджери змінюються далі. Якщо запис не вдасться, наступне збереження перепише файли повністю.
+        if self._needs_compact or not (os.path.exists(self.residents_data_file)
+                                       and os.path.exists(self.apartments_data_file)):
+            return self.prepare_compact()
+        apartment_numbers, moved_residents = self.apartment_manager.get_dirty()
+        names = dict.fromkeys(self.resident_manager.get_dirty())
+        names.update(dict.fromkeys(resident.full_name for resident in moved_residents))
+
+        # Квартири записуються першими, щоб при відтворенні мешканці могли в них заселитися
+        entries = []
+        for apartment_number in apartment_numbers:
+            apartment = self.apartment_manager.get_apartment(apartment_number)
+            row = [apartment.floor, apartment.area, apartment.num_rooms] if apartment is not None else None
+            entries.append({"op": "apartment", "apartment_number": apartment_number, "row": row})
+        for name in names:
+            rows = [list(self.resident_row(resident)[1:]) for resident in self.resident_manager.find_residents(name)]
+            entries.append({"op": "residents", "full_name": name, "rows": rows})
+
+        # Якщо журнал однаково доведеться переносити в основні файли, дописувати його немає сенсу
+        if self.journal_entries + len(entries) >= self.compact_threshold:
+            return self.prepare_compact()
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+        return lambda: self._append_journal(entries)
+
+    def prepare_compact(self):
+        # Знімає копію рядків усіх квартир і мешканців; повертає функцію, що записує їх у файли (див. prepare_save)
+        apartment_rows = [self.apartment_row(apartment) for apartment in self.apartment_manager.iter_apartments()]
+        resident_rows = [self.resident_row(resident) for resident in self.resident_manager.iter_residents()]
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+        self._needs_compact = False
+        return lambda: self._write_compacted(apartment_rows, resident_rows)
+
+    def _append_journal(self, entries):
+        try:
+            if entries:
+                with open(self.journal_file, mode='a', encoding='utf-8') as file:
+                    file.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+                    file.flush()
+                    os.fsync(file.fileno())
+            self.journal_entries += len(entries)
+            print(f"Зміни ({len(entries)}) збережено у журналі {self.journal_file}")
+        except Exception as e:
+            self._needs_compact = True
+            print(f"Помилка збереження журналу змін: {e}")
+
+    def _write_compacted(self, apartment_rows, resident_rows):
+        try:
+            self.write_apartment_rows(apartment_rows)
+            self.write_resident_rows(resident_rows)
+            # Журнал очищається останнім: якщо збій станеться раніше, повторне відтворення журналу нічого не зіпсує
+            open(self.journal_file, mode='w').close()
+            self.journal_entries = 0
+            print(f"Дані збережено у файлах {self.residents_data_file} та {self.apartments_data_file}")
+        except Exception as e:
+            self._needs_compact = True
+            print(f"Помилка збереження даних: {e}")
+
+    def iter_journal(self):
+        # Перебирає записи журналу змін як пари (запис, розмір журналу до кінця запису). Недописаний хвіст після
+        # збою (рядок без символу кінця рядка чи з некоректним JSON) завершує перебір парою (None, розмір журналу
+        # до хвоста). Файл журналу не змінюється.
+        size = 0
+        try:
+            with open(self.journal_file, mode='rb') as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("Недописаний рядок")
+                        entry = json.loads(line)
+                    except ValueError:
+                        yield None, size
+                        return
+                    size += len(line)
+                    yield entry, size
+        except FileNotFoundError:
+            return
+
+    def replay_journal(self, read_only=False):
+        # Застосовує до менеджерів записи журналу змін; повертає кількість застосованих записів.
+        # Недописаний хвіст журналу відкидається з файлу, щоб наступні записи не дописувались після нього,
+        # а при read_only - лише пропускається.
+        self.journal_entries = 0
+        for entry, size in self.iter_journal():
+            if entry is None:
+                if not read_only:
+                    with open(self.journal_file, mode='r+b') as file:
+                        file.truncate(size)
+                        file.flush()
+                        os.fsync(file.fileno())
+                break
+            self._apply_change(entry)
+            self.journal_entries += 1
+        return self.journal_entries
+
+    def _apply_change(self, entry):
+        if entry["op"] == "apartment":
+            apartment_number, row = entry["apartment_number"], entry["row"]
+            if row is None:
+                self.apartment_manager.remove_apartment(apartment_number, verbose=False)
+            elif not self.apartment_manager.update_apartment(apartment_number, *row):
+                self.apartment_manager.add_apartment(Apartment(apartment_number, *row), verbose=False)
+        elif entry["op"] == "residents":
+            full_name = entry["full_name"]
+            for resident in self.resident_manager.find_residents(full_name):
+                self.apartment_manager.move_out(resident)
+                self.resident_manager.remove_resident(resident)
+            for age, phone, apartment_number in entry["rows"]:
+                resident = Resident(full_name, age, phone)
+                self.resident_manager.add_resident(resident)
+                apartment = self.apartment_manager.get_apartment(apartment_number) if apartment_number else None
+                if apartment is not None:
+                    self.apartment_manager.move_in(resident, apartment)
+
+class SQLiteStorage:
+    # Клас для зберігання даних у базі SQLite. Має той самий інтерфейс завантаження і збереження,
+    # що й Storage (load_all, load_data, save_changes, compact), тож його можна передати в UserInterface
+    # замість CSV-сховища. Пошук квартир виконується запитами до бази без завантаження всіх даних у пам'ять.
+    schema = """
+        CREATE TABLE IF NOT EXISTS apartments (
+            apartment_number TEXT PRIMARY KEY,
+            floor INTEGER NOT NULL,
+            area REAL NOT NULL,
+            num_rooms INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS apartments_floor ON apartments (floor);
+        CREATE INDEX IF NOT EXISTS apartments_num_rooms ON apartments (num_rooms);
+        CREATE INDEX IF NOT EXISTS apartments_area ON apartments (area);
+        CREATE TABLE IF NOT EXISTS residents (
+            id INTEGER PRIMARY KEY,
+            full_name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            phone TEXT NOT NULL,
+            apartment_number TEXT REFERENCES apartments (apartment_number) ON DELETE SET NULL
+        );
+        CREATE INDEX IF NOT EXISTS residents_full_name ON residents (full_name);
+        CREATE INDEX IF NOT EXISTS residents_apartment_number ON residents (apartment_number);
+    """
+    apartment_columns = "apartment_number, floor, area, num_rooms"
+    upsert_apartment = ("INSERT INTO apartments (apartment_number, floor, area, num_rooms) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (apartment_number) DO UPDATE SET "
+                        "floor = excluded.floor, area = excluded.area, num_rooms = excluded.num_rooms")
+    insert_resident = "INSERT INTO residents (full_name, age, phone, apartment_number) VALUES (?, ?, ?, ?)"
+    batch_size = 500  # Кількість параметрів в одному запиті IN (...)
+
+    def __init__(self, database_file, resident_manager, apartment_manager):
+        self.database_file = database_file  # Ім'я файлу бази даних
+        self.resident_manager = resident_manager  # Менеджер мешканців
+        self.apartment_manager = apartment_manager  # Менеджер квартир
+        # Запис може виконуватися в іншому потоці (див. prepare_save), але не одночасно з іншими зверненнями
+        self.connection = sqlite3.connect(database_file, check_same_thread=False)
+        self._needs_compact = False  # Чи не вдалося останнє збереження (тоді наступне переписує базу повністю)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(self.schema)
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _resident_row(resident):
+        apartment_number = resident.apartment.apartment_number if resident.apartment is not None else None
+        return resident.full_name, resident.age, resident.phone, apartment_number
+
+    @staticmethod
+    def _apartment_row(apartment):
+        return apartment.apartment_number, apartment.floor, apartment.area, apartment.num_rooms
+
+    def load_all(self):
+        # Завантажує всіх мешканців і всі квартири та зв'язує їх між собою
+        apartments = {row[0]: Apartment(*row) for row in
+                      self.connection.execute(f"SELECT {self.apartment_columns} FROM apartments ORDER BY rowid")}
+        residents = []
+        for full_name, age, phone, apartment_number in self.connection.execute(
+                "SELECT full_name, age, phone, apartment_number FROM residents ORDER BY id"):
+            resident = Resident(full_name, age, phone)
+            apartment = apartments.get(apartment_number)
+            if apartment is not None:
+                resident.apartment = apartment
+                apartment.residents.append(resident)
+            residents.append(resident)
+        print(f"Дані завантажено з бази {self.database_file}")
+        return residents, list(apartments.values())
+
+    def load_data(self):
+        # Завантажує дані з бази в менеджери
+        residents, apartments = self.load_all()
+        self.apartment_manager.apartments = apartments
+        self.resident_manager.residents = residents
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+
+    def save_changes(self):
+        # Записує в базу лише квартири та мешканців, змінених з моменту останнього збереження
+        self.prepare_save()()
+
+    def compact(self):
+        # Переписує всю базу поточним станом менеджерів в одній транзакції
+        self.prepare_compact()()
+
+    def prepare_save(self):
+        # Те саме, що Storage.prepare_save: збирає зміни без звернення до бази і повертає функцію їх запису
+        if self._needs_compact:
+            return self.prepare_compact()
+        apartment_numbers, moved_residents = self.apartment_manager.get_dirty()
+        names = dict.fromkeys(self.resident_manager.get_dirty())
+        names.update(dict.fromkeys(resident.full_name for resident in moved_residents))
+        upserts, deletes = [], []
+        for apartment_number in apartment_numbers:
+            apartment = self.apartment_manager.get_apartment(apartment_number)
+            if apartment is not None:
+                upserts.append(self._apartment_row(apartment))
+            else:
+                deletes.append((apartment_number,))
+        residents = [self._resident_row(resident) for name in names for resident in self.resident_manager.find_residents(name)]
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+
+        def write():
+            try:
+                with self.connection:
+                    self.connection.executemany(self.upsert_apartment, upserts)
+                    self.connection.executemany("DELETE FROM apartments WHERE apartment_number = ?", deletes)
+                    self.connection.executemany("DELETE FROM residents WHERE full_name = ?", ((name,) for name in names))
+                    self.connection.executemany(self.insert_resident, residents)
+                print(f"Зміни ({len(apartment_numbers) + len(names)}) збережено у базі {self.database_file}")
+            except sqlite3.Error as e:
+                self._needs_compact = True
+                print(f"Помилка збереження змін у базі: {e}")
+        return write
+
+    def prepare_compact(self):
+        # Знімає копію рядків усіх квартир і мешканців; повертає функцію, що переписує ними базу
+        apartments = [self._apartment_row(apartment) for apartment in self.apartment_manager.iter_apartments()]
+        residents = [self._resident_row(resident) for resident in self.resident_manager.iter_residents()]
+        self.resident_manager.clear_dirty()
+        self.apartment_manager.clear_dirty()
+        self._needs_compact = False
+
+        def write():
+            try:
+                with self.connection:
+                    self.connection.execute("DELETE FROM residents")
+                    self.connection.execute("DELETE FROM apartments")
+                    self.connection.executemany(self.upsert_apartment, apartments)
+                    self.connection.executemany(self.insert_resident, residents)
+                print(f"Дані збережено у базі {self.database_file}")
+            except sqlite3.Error as e:
+                self._needs_compact = True
+                print(f"Помилка збереження даних у базі: {e}")
+        return write
+
+    def import_csv(self, storage):
+        # Переносить дані з CSV-файлів сховища Storage у базу, замінюючи її вміст
+        apartment_numbers = set()
+        with self.connection:
+            self.connection.execute("DELETE FROM residents")
+            self.connection.execute("DELETE FROM apartments")
+            for chunk in storage.iter_apartment_rows():
+                self.connection.executemany(self.upsert_apartment, (row[:4] for row in chunk))
+                apartment_numbers.update(row[0] for row in chunk)
+            for chunk in storage.iter_resident_rows():
+                self.connection.executemany(self.insert_resident, (
+                    (full_name, age, phone, apartment_number if apartment_number in apartment_numbers else None)
+                    for full_name, age, phone, apartment_number in chunk))
+        print(f"Дані з файлів {storage.residents_data_file} та {storage.apartments_data_file} імпортовано у базу")
+
+    def export_csv(self, storage):
+        # Потоково вивантажує вміст бази у CSV-файли сховища Storage
+        storage.write_apartment_rows(self.connection.execute(
+            "SELECT a.apartment_number, a.floor, a.area, a.num_rooms, "
+            "COALESCE((SELECT GROUP_CONCAT(full_name, ', ') FROM "
+            "(SELECT full_name FROM residents r WHERE r.apartment_number = a.apartment_number ORDER BY r.id)), '') "
+            "FROM apartments a ORDER BY a.rowid"))
+        storage.write_resident_rows(self.connection.execute(
+            "SELECT full_name, age, phone, COALESCE(apartment_number, '') FROM residents ORDER BY id"))
+        print(f"Дані з бази експортовано у файли {storage.residents_data_file} та {storage.apartments_data_file}")
+
+    def get_apartment(self, apartment_number):
+        # Повертає квартиру з бази за її номером або None
+        apartments = self._query_apartments("WHERE apartment_number = ?", [apartment_number])
+        return apartments[0] if apartments else None
+
+    def get_apartments_by_num_rooms(self, num_rooms):
+        # Повертає список квартир з вказаною кількістю кімнат
+        return self.find_apartments(num_rooms=num_rooms)
+
+    def get_apartments_by_floor(self, floor):
+        # Повертає список квартир на вказаному поверсі
+        return self.find_apartments(floor=floor)
+
+    def get_apartments_by_area(self, area):
+        # Повертає список квартир з вказаною площею
+        return self.find_apartments(area=area)
+
+    def get_vacant_apartments(self):
+        # Повертає список вільних квартир (без мешканців)
+        return self._query_apartments(
+            "WHERE NOT EXISTS (SELECT 1 FROM residents r WHERE r.apartment_number = apartments.apartment_number) "
+            "ORDER BY rowid", [])
+
+    def find_apartments(self, floor=None, num_rooms=None, area=None, order_by=None, descending=False,
+                        limit=None, offset=0):
+        # Те саме, що ApartmentManager.find_apartments, але умови, сортування і обмеження виконує SQLite
+        if order_by is not None and order_by not in ApartmentManager.sortable_fields:
+            raise ValueError(f"Неможливо сортувати за полем {order_by}")
+        conditions, parameters = [], []
+        for field, value in (("floor", floor), ("num_rooms", num_rooms), ("area", area)):
+            if value is None:
+                continue
+            low, high = value if isinstance(value, (tuple, list)) else (value, value)
+            if low is not None:
+                conditions.append(f"{field} >= ?")
+                parameters.append(low)
+            if high is not None:
+                conditions.append(f"{field} <= ?")
+                parameters.append(high)
+        clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+        clause += f" ORDER BY {order_by or 'rowid'}{' DESC' if descending else ''}"
+        if limit is not None or offset:
+            clause += " LIMIT ? OFFSET ?"
+            parameters += [limit if limit is not None else -1, offset]
+        return self._query_apartments(clause, parameters)
+
+    def _query_apartments(self, clause, parameters):
+        # Виконує запит до квартир і підвантажує мешканців лише знайдених квартир
+        apartments = {row[0]: Apartment(*row) for row in
+                      self.connection.execute(f"SELECT {self.apartment_columns} FROM apartments {clause}", parameters)}
+        numbers = list(apartments)
+        for start in range(0, len(numbers), self.batch_size):
+            batch = numbers[start:start + self.batch_size]
+            placeholders = ", ".join("?" * len(batch))
+            for full_name, age, phone, apartment_number in self.connection.execute(
+                    "SELECT full_name, age, phone, apartment_number FROM residents "
+                    f"WHERE apartment_number IN ({placeholders}) ORDER BY id", batch):
+                resident = Resident(full_name, age, phone)
+                resident.apartment = apartments[apartment_number]
+                apartments[apartment_number].residents.append(resident)
+        return list(apartments.values())
+
 class UserInterface:
-    def __init__(self, resident_manager, apartment_manager):
+    report_page_size = 20  # Кількість записів на сторінці звіту
+
+    def __init__(self, resident_manager, apartment_manager, storage=None, metrics=None):
         self.resident_manager = resident_manager
         self.apartment_manager = apartment_manager
-        self.storage = Storage(residents_data_file, apartments_data_file, resident_manager, apartment_manager)
+        self.storage = storage or Storage(residents_data_file, apartments_data_file, resident_manager, apartment_manager)
         self.resident_handler = ResidentHandler()
+        self.metrics = metrics or Metrics()  # Збір метрик продуктивності (за замовчуванням вимкнений)
+        self.profile_next = False  # Чи профілювати наступну дію головного меню
         self.loaded_data = False
+        self.synced_with_files = False  # Чи відповідають основні файли і журнал стану менеджерів до змін
 
     def main_menu(self):
         while True:
@@ -236,56 +1203,92 @@ class UserInterface:
             print("8. Згенерувати звіти")
             print("9. Завантажити дані з файлу")
             print("10. Зберегти дані у файл")
+            print("11. Метрики продуктивності")
+            print("12. Пошук мешканців")
+            print("13. Завантажити дані зі знімка")
+            print("14. Зберегти знімок даних")
 
             choice = input("Виберіть опцію: ")
 
-            if choice == "1":
-                self.add_resident()
-            elif choice == "2":
-                self.remove_resident()
-            elif choice == "3":
-                self.add_apartment()
-            elif choice == "4":
-                self.remove_apartment()
-            elif choice == "5":
-                self.assign_resident_to_apartment()
-            elif choice == "6":
-                self.evacuate_resident_from_apartment()
-            elif choice == "7":
-                self.view_apartments_menu()
-            elif choice == "8":
-                self.generate_reports()
-            elif choice == "9":
-                if not self.loaded_data:
-                    self.load_data_from_file()
-                    self.loaded_data = True
-                else:
-                    print("Дані вже завантажені.")
-            elif choice == "10":
-                self.save_data()
+            if self.profile_next and choice != "11":
+                self.profile_next = False
+                with self.metrics.capture():
+                    self.handle_choice(choice)
+                print(self.metrics.profile)
             else:
-                print("Невірний вибір. Спробуйте ще раз.")
+                self.handle_choice(choice)
+
+    def handle_choice(self, choice):
+        # Виконує дію головного меню
+        if choice == "1":
+            self.add_resident()
+        elif choice == "2":
+            self.remove_resident()
+        elif choice == "3":
+            self.add_apartment()
+        elif choice == "4":
+            self.remove_apartment()
+        elif choice == "5":
+            self.assign_resident_to_apartment()
+        elif choice == "6":
+            self.evacuate_resident_from_apartment()
+        elif choice == "7":
+            self.view_apartments_menu()
+        elif choice == "8":
+            self.generate_reports()
+        elif choice == "9":
+            if not self.loaded_data:
+                self.load_data_from_file()
+                self.loaded_data = True
+            else:
+                print("Дані вже завантажені.")
+        elif choice == "10":
+            self.save_data()
+        elif choice == "11":
+            self.metrics_menu()
+        elif choice == "12":
+            self.search_residents()
+        elif choice == "13":
+            self.load_data_from_snapshot(input("Введіть шлях до файлу знімка: "))
+        elif choice == "14":
+            self.save_snapshot(input("Введіть шлях до файлу знімка: "))
+        else:
+            print("Невірний вибір. Спробуйте ще раз.")
 
     def save_data(self):
-        data_to_save = {
-            "residents": self.resident_manager.residents,
-            "apartments": self.apartment_manager.apartments
-        }
-        self.storage.save_residents(data_to_save["residents"])
-        self.storage.save_apartments(data_to_save["apartments"])
+        # Після завантаження чи повного збереження достатньо дописати зміни в журнал,
+        # інакше файли переписуються повністю поточним станом. У базу SQLite, дані якої не завантажувались
+        # у менеджери, не записуємо нічого: і повне переписування, і запис змін (вони замінюють усіх мешканців
+        # з тим самим П.І.Б. і параметри квартири з тим самим номером) знищили б записи бази, яких немає в пам'яті.
+        if isinstance(self.storage, SQLiteStorage) and not self.loaded_data:
+            print("Дані з бази ще не завантажено. Щоб не перезаписати записи бази, спершу завантажте дані (опція 9).")
+            return
+        if self.synced_with_files:
+            self.storage.save_changes()
+        else:
+            self.storage.compact()
+            self.synced_with_files = True
         print("Дані збережено в файлах.")
 
     def load_data_from_file(self):
-        residents = self.storage.load_residents()
-        apartments = self.storage.load_apartments()
-
-        if residents is not None:
-            self.resident_manager.residents = residents
+        self.storage.load_data()
+        self.synced_with_files = True
+        print("Дані завантажено з файлів.")
 
-        if apartments is not None:
-            self.apartment_manager.apartments = apartments
+    def load_data_from_snapshot(self, file_name):
+        # Знімки підтримує лише сховище CSV-файлів; після завантаження збереження переписує файли повністю
+        if isinstance(self.storage, SQLiteStorage):
+            print("Знімки даних доступні лише для сховища CSV-файлів.")
+        elif self.storage.load_data_from_snapshot(file_name):
+            self.loaded_data = True
+            self.synced_with_files = False
+            print("Дані завантажено зі знімка.")
 
-        print("Дані завантажено з файлів.")
+    def save_snapshot(self, file_name):
+        if isinstance(self.storage, SQLiteStorage):
+            print("Знімки даних доступні лише для сховища CSV-файлів.")
+        else:
+            self.storage.save_snapshot(file_name)
 
     def add_resident(self):
         full_name = input("Введіть П.І.Б. мешканця: ")
@@ -297,13 +1300,22 @@ class UserInterface:
 
     def remove_resident(self):
         full_name = input("Введіть П.І.Б. мешканця, якого потрібно видалити: ")
-        for resident in self.resident_manager.residents:
-            if resident.full_name == full_name:
-                self.resident_manager.remove_resident(resident)
-                print(f"Мешканця {full_name} видалено.")
-                break
+        residents = self.resident_manager.find_residents(full_name)
+        if residents:
+            self.apartment_manager.move_out(residents[0])
+            self.resident_manager.remove_resident(residents[0])
+            print(f"Мешканця {full_name} видалено.")
         else:
-            print(f"Мешканця {full_name} не знайдено.")
+            print(f"Мешканця {full_name} не знайдено." + self.resident_handler.suggestion(self.resident_manager, full_name))
+
+    def search_residents(self):
+        text = input("Введіть П.І.Б., його частину або телефон: ")
+        residents = self.resident_manager.search_residents(text)
+        if residents:
+            for resident in residents:
+                print(resident)
+        else:
+            print("Мешканців не знайдено.")
 
     def add_apartment(self):
         apartment_number = input("Введіть номер квартири: ")
@@ -334,44 +1346,133 @@ class UserInterface:
                 print(
                     f"Номер квартири: {apartment.apartment_number}, Поверх: {apartment.floor}, Площа: {apartment.area}, Кількість кімнат: {apartment.num_rooms}")
 
+    @property
+    def apartment_queries(self):
+        # Джерело для пошуку квартир: поки дані не завантажені в менеджери, запити до бази SQLite
+        # виконуються в самій базі, без завантаження всіх записів у пам'ять
+        if isinstance(self.storage, SQLiteStorage) and not self.loaded_data:
+            return self.storage
+        return self.apartment_manager
+
+    def view_vacant_apartments(self):
+        self.print_apartments(self.apartment_queries.get_vacant_apartments())
+
     def view_apartments_by_num_rooms(self):
         num_rooms = int(input("Введіть кількість кімнат для пошуку: "))
-        filtered_apartments = self.apartment_manager.get_apartments_by_num_rooms(num_rooms)
+        filtered_apartments = self.apartment_queries.get_apartments_by_num_rooms(num_rooms)
         self.print_apartments(filtered_apartments)
 
     def view_apartments_by_floor(self):
         floor = int(input("Введіть поверх для пошуку: "))
-        filtered_apartments = self.apartment_manager.get_apartments_by_floor(floor)
+        filtered_apartments = self.apartment_queries.get_apartments_by_floor(floor)
         self.print_apartments(filtered_apartments)
 
     def view_apartments_by_area(self):
-        area = float(input("Введіть площу для пошуку: "))
-        filtered_apartments = self.apartment_manager.get_apartments_by_area(area)
+        area = self.input_range("Введіть мінімальну площу", "Введіть максимальну площу", float)
+        filtered_apartments = self.apartment_queries.find_apartments(area=area, order_by="area")
+        self.print_apartments(filtered_apartments)
+
+    def view_apartments_by_parameters(self):
+        floor = self.input_range("Введіть мінімальний поверх", "Введіть максимальний поверх", int)
+        num_rooms = self.input_range("Введіть мінімальну кількість кімнат", "Введіть максимальну кількість кімнат", int)
+        area = self.input_range("Введіть мінімальну площу", "Введіть максимальну площу", float)
+        order_by = input("Сортувати за (floor, area, num_rooms, apartment_number; Enter - без сортування): ") or None
+        limit = input("Скільки квартир показати (Enter - усі): ")
+        offset = input("Скільки квартир пропустити (Enter - 0): ")
+        try:
+            filtered_apartments = self.apartment_queries.find_apartments(
+                floor=floor, num_rooms=num_rooms, area=area, order_by=order_by,
+                limit=int(limit) if limit else None, offset=int(offset) if offset else 0)
+        except ValueError as e:
+            print(f"Помилка пошуку: {e}")
+            return
         self.print_apartments(filtered_apartments)
 
+    def input_range(self, prompt_from, prompt_to, cast):
+        # Зчитує діапазон значень; порожнє введення означає відсутність межі
+        low = input(f"{prompt_from} (Enter - без обмеження): ")
+        high = input(f"{prompt_to} (Enter - без обмеження): ")
+        if not low and not high:
+            return None
+        return (cast(low) if low else None, cast(high) if high else None)
+
     def generate_reports(self):
         reports = Reports()
         print("Генерація звітів:")
         print("1. Звіт про мешканців")
         print("2. Звіт про квартири")
+        print("3. Аналітика по будинку")
         report_choice = input("Виберіть тип звіту: ")
 
-        if report_choice == "1":
-            residents_report = reports.generate_full_residents_report(self.resident_manager.residents)
-            print(residents_report)
-        elif report_choice == "2":
-            apartments_report = reports.generate_full_apartments_report(self.apartment_manager.apartments)
-            print(apartments_report)
+        if report_choice in ("1", "2"):
+            report_format = input("Формат звіту (text, csv, jsonl; Enter - text): ") or "text"
+            page = input(f"Номер сторінки по {self.report_page_size} записів (Enter - усі): ")
+            file_name = input("Файл для збереження звіту (Enter - вивести на екран): ")
+            if report_choice == "1":
+                make_report, records = reports.iter_residents_report, self.resident_manager.iter_residents()
+            else:
+                make_report, records = reports.iter_apartments_report, self.apartment_manager.iter_apartments()
+            try:
+                lines = make_report(records, report_format, int(page) if page else None, self.report_page_size)
+                if file_name:
+                    with open(file_name, mode='w', encoding='utf-8', newline='') as file:
+                        count = reports.write_report(lines, file)
+                    print(f"Звіт ({count} рядків) збережено у файлі {file_name}")
+                else:
+                    reports.write_report(lines, sys.stdout)
+            except (ValueError, OSError) as e:
+                print(f"Помилка генерації звіту: {e}")
+        elif report_choice == "3":
+            analytics = BuildingAnalytics.from_managers(self.resident_manager, self.apartment_manager)
+            print("\n".join(analytics.summary_lines()))
         else:
             print("Невірний вибір звіту.")
 
+    def metrics_menu(self):
+        while True:
+            print(f"Метрики продуктивності (збір {'увімкнено' if self.metrics.enabled else 'вимкнено'}):")
+            print("1. Увімкнути/вимкнути збір метрик")
+            print("2. Показати метрики")
+            print("3. Зберегти метрики у файл")
+            print("4. Профілювати наступну дію (cProfile і tracemalloc)")
+            print("5. Скинути метрики")
+            print("6. Назад")
+            choice = input("Виберіть опцію: ")
+
+            if choice == "1":
+                if self.metrics.enabled:
+                    self.metrics.disable()
+                else:
+                    self.metrics.enable(*instrumented_classes, exclude=instrumented_exclude)
+            elif choice == "2":
+                print(self.metrics.to_prometheus(), end="")
+            elif choice == "3":
+                file_name = input("Файл для збереження (.json - JSON, .prom - Prometheus): ")
+                try:
+                    self.metrics.dump(file_name)
+                    print(f"Метрики збережено у файлі {file_name}")
+                except (ValueError, OSError) as e:
+                    print(f"Помилка збереження метрик: {e}")
+            elif choice == "4":
+                self.profile_next = True
+                print("Наступну дію головного меню буде профільовано.")
+                break
+            elif choice == "5":
+                self.metrics.reset()
+            elif choice == "6":
+                break
+            else:
+                print("Невірний вибір. Спробуйте ще раз.")
+
     def view_apartments_menu(self):
         while True:
             print("Меню виведення квартир за параметром:")
             print("1. За кількістю кімнат")
             print("2. За поверхом")
             print("3. За площею")
-            print("4. Назад")
+            print("4. За кількома параметрами")
+            print("5. Вільні квартири")
+            print("6. Назад")
             choice = input("Виберіть опцію: ")
 
             if choice == "1":
@@ -381,6 +1482,10 @@ class UserInterface:
             elif choice == "3":
                 self.view_apartments_by_area()
             elif choice == "4":
+                self.view_apartments_by_parameters()
+            elif choice == "5":
+                self.view_vacant_apartments()
+            elif choice == "6":
                 break
             else:
                 print("Невірний вибір. Спробуйте ще раз.")
@@ -389,7 +1494,25 @@ class UserInterface:
 residents_data_file = "residents_data.csv"
 apartments_data_file = "apartments_data.csv"
 
+# Класи, методи яких вимірює збір метрик; методи, що чекають на введення з клавіатури, не вимірюються
+instrumented_classes = (ResidentManager, ApartmentManager, ResidentHandler, Storage, SQLiteStorage, Reports)
+instrumented_exclude = ("ResidentHandler.assign_resident_to_apartment", "ResidentHandler.evacuate_resident_from_apartment")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Облік мешканців і квартир будинку")
+    parser.add_argument("--sqlite", metavar="FILE", help="зберігати дані у базі SQLite замість CSV-файлів")
+    parser.add_argument("--import-csv", action="store_true", help="перед запуском імпортувати CSV-файли у базу SQLite")
+    parser.add_argument("--snapshot", metavar="FILE", help="перед запуском завантажити дані з двійкового знімка")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="збирати метрики продуктивності і записати їх у файл при виході (.json або .prom)")
+    parser.add_argument("--profile", action="store_true", help="профілювати весь сеанс через cProfile і tracemalloc")
+    args = parser.parse_args()
+    if args.snapshot and args.sqlite:
+        parser.error("знімки даних доступні лише для сховища CSV-файлів, без --sqlite")
+
+    metrics = Metrics()
+    if args.metrics:
+        metrics.enable(*instrumented_classes, exclude=instrumented_exclude)
 
     resident_manager = ResidentManager()
     apartment_manager = ApartmentManager()
@@ -401,5 +1524,22 @@ if __name__ == "__main__":
     resident_manager.add_resident(r2)
     apartment_manager.add_apartment(a1)
 
-    user_interface = UserInterface(resident_manager, apartment_manager)
-    user_interface.main_menu()
+    storage = None
+    if args.sqlite:
+        storage = SQLiteStorage(args.sqlite, resident_manager, apartment_manager)
+        if args.import_csv:
+            storage.import_csv(Storage(residents_data_file, apartments_data_file, resident_manager, apartment_manager))
+
+    user_interface = UserInterface(resident_manager, apartment_manager, storage, metrics)
+    if args.snapshot:
+        user_interface.load_data_from_snapshot(args.snapshot)
+    try:
+        with metrics.capture() if args.profile else nullcontext():
+            user_interface.main_menu()
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        if args.metrics:
+            metrics.dump(args.metrics)
+        elif args.profile:
+            print(metrics.profile)
@@ -0,0 +1,215 @@
+import cProfile
+import functools
+import inspect
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Межі кошиків гістограми тривалості викликів, секунди
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+def count_items(value):
+    # Кількість елементів у результаті виклику: довжина списку чи словника, сума довжин для кортежу списків
+    # (наприклад, (мешканці, квартири)), 1 для будь-якого іншого значення і 0 для None
+    if value is None:
+        return 0
+    if isinstance(value, (list, dict, set, frozenset)):
+        return len(value)
+    if isinstance(value, tuple) and value and all(isinstance(part, (list, dict, set)) for part in value):
+        return sum(len(part) for part in value)
+    return 1
+
+
+class Histogram:
+    # Гістограма тривалості викликів одного методу з лічильниками викликів, помилок і оброблених елементів
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Останній кошик - понад найбільшу межу
+        self.count = 0  # Кількість викликів
+        self.total = 0.0  # Сумарна тривалість, секунди
+        self.items = 0  # Кількість елементів у результатах
+        self.errors = 0  # Кількість викликів, що завершились винятком
+
+    def observe(self, seconds, items=0, error=False):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.items += items
+        self.errors += error
+
+    def cumulative(self):
+        # Пари (межа, кількість викликів не довших за межу) у форматі Prometheus, остання межа - "+Inf"
+        result, running = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class Metrics:
+    # Збір метрик продуктивності методів класів. Поки збір вимкнено, класи не змінені, тож накладних витрат немає;
+    # enable підміняє публічні методи класів обгортками, що вимірюють тривалість, а disable повертає оригінали.
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}  # "Клас.метод" -> Histogram
+        self.profile = None  # Текстовий звіт cProfile останнього захоплення
+        self.allocations = None  # Найбільші виділення пам'яті останнього захоплення: (місце, байти, кількість)
+        self._originals = []  # (клас, ім'я атрибута, оригінальний атрибут)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self._originals)
+
+    def enable(self, *classes, exclude=()):
+        # Вмикає збір для публічних методів указаних класів, крім перелічених у exclude як "Клас.метод"
+        if self.enabled:
+            self.disable()
+        for cls in classes:
+            for attribute_name, attribute in list(vars(cls).items()):
+                name = f"{cls.__name__}.{attribute_name}"
+                if attribute_name.startswith("_") or name in exclude:
+                    continue
+                if isinstance(attribute, (staticmethod, classmethod)):
+                    wrapped = type(attribute)(self._wrap(name, attribute.__func__))
+                elif inspect.isfunction(attribute):
+                    wrapped = self._wrap(name, attribute)
+                else:
+                    continue
+                self._originals.append((cls, attribute_name, attribute))
+                setattr(cls, attribute_name, wrapped)
+
+    def disable(self):
+        # Повертає оригінальні методи; зібрані метрики зберігаються
+        for cls, attribute_name, attribute in reversed(self._originals):
+            setattr(cls, attribute_name, attribute)
+        self._originals = []
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+        self.profile = None
+        self.allocations = None
+
+    def record(self, name, seconds, items=0, error=False):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds, items, error)
+
+    def _wrap(self, name, function):
+        # Якщо метод повертає генератор, виклик вимірюється до вичерпання генератора
+        # (див. _measure_iterator), інакше - до повернення результату
+        record = self.record
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                record(name, time.perf_counter() - start, 0, True)
+                raise
+            if inspect.isgenerator(result):
+                return self._measure_iterator(name, result, time.perf_counter() - start)
+            record(name, time.perf_counter() - start, count_items(result))
+            return result
+        return wrapper
+
+    def _measure_iterator(self, name, iterator, elapsed):
+        # Враховує лише час всередині генератора (без часу споживача між елементами),
+        # а елементами вважає видані значення
+        items, error = 0, False
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    break
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - start
+                items += count_items(value)
+                yield value
+        finally:
+            iterator.close()
+            self.record(name, elapsed, items, error)
+
+    @contextmanager
+    def capture(self, top=25):
+        # Профілює блок коду через cProfile і tracemalloc; результати - у self.profile і self.allocations
+        profiler = cProfile.Profile()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profiler.enable()
+        try:
+            yield self
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+            self.profile = stream.getvalue()
+            self.allocations = [(str(statistic.traceback), statistic.size, statistic.count)
+                                for statistic in snapshot.statistics("lineno")[:top]]
+
+    def to_dict(self):
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {
+            "methods": {
+                name: {"calls": h.count, "errors": h.errors, "items": h.items, "total_seconds": h.total,
+                       "mean_seconds": h.total / h.count if h.count else 0.0,
+                       "buckets": {str(bound): count for bound, count in h.cumulative()}}
+                for name, h in sorted(histograms.items())
+            },
+            "profile": self.profile,
+            "allocations": [{"location": location, "bytes": size, "count": count}
+                            for location, size, count in self.allocations or ()],
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix="registry"):
+        # Текстовий формат експозиції Prometheus
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+        lines = [f"# HELP {prefix}_call_duration_seconds Тривалість викликів методів",
+                 f"# TYPE {prefix}_call_duration_seconds histogram"]
+        for name, histogram in histograms:
+            for bound, count in histogram.cumulative():
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{method="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{method="{name}"}} {histogram.total}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{method="{name}"}} {histogram.count}')
+        for metric, attribute, description in (("call_items_total", "items", "Кількість оброблених елементів"),
+                                               ("call_errors_total", "errors", "Кількість викликів з помилкою")):
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, histogram in histograms:
+                lines.append(f'{prefix}_{metric}{{method="{name}"}} {getattr(histogram, attribute)}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, file_name, output_format=None):
+        # Записує метрики у файл; формат визначається розширенням (.prom, .txt - Prometheus, інакше JSON)
+        if output_format is None:
+            output_format = "prometheus" if file_name.endswith((".prom", ".txt")) else "json"
+        if output_format not in ("json", "prometheus"):
+            raise ValueError(f"Невідомий формат метрик: {output_format}")
+        with open(file_name, mode='w', encoding='utf-8') as file:
+            file.write(self.to_prometheus() if output_format == "prometheus" else self.to_json())
@@ -0,0 +1,265 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from operator import itemgetter
+
+
+def normalize(text):
+    # Нормалізує ім'я для пошуку: без урахування регістру і зайвих пробілів
+    return " ".join(text.casefold().split())
+
+
+def phone_digits(text):
+    # Залишає в номері телефону лише цифри
+    return "".join(char for char in text if char.isdigit())
+
+
+def trigrams(text):
+    # Множина триграм нормалізованого рядка; пробіли на краях дають окремі грами для початку і кінця слова
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class _SortedKeys:
+    # Відсортовані ключі з ідентифікаторами записів, розбиті на блоки: вставка і вилучення зсувають елементи
+    # лише одного блоку (не довшого за 2 * load), а потрібний блок і префікс шукаються через bisect
+    load = 1000
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self._keys = []  # Блоки відсортованих ключів
+        self._ids = []  # Ідентифікатори записів для кожного блоку ключів
+        self._maxes = []  # Останній (найбільший) ключ кожного блоку
+        for start in range(0, len(pairs), self.load):
+            chunk = pairs[start:start + self.load]
+            self._keys.append([key for key, _ in chunk])
+            self._ids.append(array('l', (ident for _, ident in chunk)))
+            self._maxes.append(chunk[-1][0])
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._keys)
+
+    def add(self, key, ident):
+        if not self._keys:
+            self._keys.append([key])
+            self._ids.append(array('l', (ident,)))
+            self._maxes.append(key)
+            return
+        index = min(bisect_right(self._maxes, key), len(self._keys) - 1)
+        keys, ids = self._keys[index], self._ids[index]
+        position = bisect_right(keys, key)
+        keys.insert(position, key)
+        ids.insert(position, ident)
+        self._maxes[index] = keys[-1]
+        if len(keys) > 2 * self.load:
+            self._keys[index:index + 1] = keys[:self.load], keys[self.load:]
+            self._ids[index:index + 1] = ids[:self.load], ids[self.load:]
+            self._maxes[index:index + 1] = keys[self.load - 1], keys[-1]
+
+    def remove(self, key, ident):
+        # Однакові ключі можуть продовжуватися в наступних блоках
+        index = bisect_left(self._maxes, key)
+        while index < len(self._keys):
+            keys, ids = self._keys[index], self._ids[index]
+            position = bisect_left(keys, key)
+            while position < len(keys) and keys[position] == key:
+                if ids[position] == ident:
+                    del keys[position]
+                    del ids[position]
+                    if keys:
+                        self._maxes[index] = keys[-1]
+                    else:
+                        del self._keys[index], self._ids[index], self._maxes[index]
+                    return
+                position += 1
+            if position < len(keys):
+                return
+            index += 1
+
+    def prefix(self, prefix):
+        # Перебирає пари (ключ, ідентифікатор) з ключами, що починаються з prefix, у порядку ключів
+        index = bisect_left(self._maxes, prefix)
+        while index < len(self._keys):
+            keys, ids = self._keys[index], self._ids[index]
+            for position in range(bisect_left(keys, prefix), len(keys)):
+                if not keys[position].startswith(prefix):
+                    return
+                yield keys[position], ids[position]
+            index += 1
+
+
+class ResidentSearchIndex:
+    # Індекс пошуку мешканців за префіксом імені (будь-якого слова П.І.Б.), нечітким збігом за триграмами
+    # і номером телефону. Працює з будь-якими об'єктами з атрибутами full_name і phone.
+    # Вилучені мешканці лише позначаються відсутніми у списках триграм, а списки перебудовуються,
+    # коли вилучених стає більше, ніж наявних.
+    def __init__(self, residents=(), max_gram_share=0.05, min_gram_postings=1000):
+        self.max_gram_share = max_gram_share  # Грами, що трапляються у більшій частці імен, не відбирають кандидатів
+        self.min_gram_postings = min_gram_postings  # ...якщо вони трапляються хоча б у стількох іменах
+        self.rebuild(residents)
+
+    def rebuild(self, residents):
+        # Будує індекс заново для вказаних мешканців
+        self._records = {}  # Ідентифікатор -> мешканець
+        self._ids = {}  # Мешканець -> ідентифікатор
+        self._names = {}  # Ідентифікатор -> нормалізоване П.І.Б.
+        self._phones = {}  # Ідентифікатор -> цифри телефону
+        for ident, resident in enumerate(residents):
+            self._records[ident] = resident
+            self._ids[resident] = ident
+            self._names[ident] = normalize(resident.full_name)
+            self._phones[ident] = phone_digits(resident.phone)
+        self._next_id = len(self._records)
+        self._name_keys = _SortedKeys((key, ident) for ident, name in self._names.items()
+                                      for key in self._word_keys(name))
+        self._phone_keys = _SortedKeys((phone, ident) for ident, phone in self._phones.items() if phone)
+        self._rebuild_grams()
+
+    def _rebuild_grams(self):
+        self._grams = {}  # Триграма -> масив ідентифікаторів
+        for ident, name in self._names.items():
+            for gram in trigrams(name):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    postings = self._grams[gram] = array('l')
+                postings.append(ident)
+        self._removed = 0
+
+    @staticmethod
+    def _word_keys(name):
+        # Ключі префіксного індексу: ім'я, починаючи з кожного слова, тож "петренко іван" знаходиться і за "іван"
+        keys = [name]
+        position = name.find(" ")
+        while position != -1:
+            keys.append(name[position + 1:])
+            position = name.find(" ", position + 1)
+        return keys
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, resident):
+        if resident in self._ids:
+            return
+        ident = self._next_id
+        self._next_id += 1
+        name, phone = normalize(resident.full_name), phone_digits(resident.phone)
+        self._records[ident] = resident
+        self._ids[resident] = ident
+        self._names[ident] = name
+        self._phones[ident] = phone
+        for key in self._word_keys(name):
+            self._name_keys.add(key, ident)
+        if phone:
+            self._phone_keys.add(phone, ident)
+        for gram in trigrams(name):
+            postings = self._grams.get(gram)
+            if postings is None:
+                postings = self._grams[gram] = array('l')
+            postings.append(ident)
+
+    def remove(self, resident):
+        ident = self._ids.pop(resident, None)
+        if ident is None:
+            return
+        del self._records[ident]
+        name, phone = self._names.pop(ident), self._phones.pop(ident)
+        for key in self._word_keys(name):
+            self._name_keys.remove(key, ident)
+        if phone:
+            self._phone_keys.remove(phone, ident)
+        self._removed += 1
+        if self._removed > len(self._records):
+            self._rebuild_grams()
+
+    def prefix(self, text, limit=None):
+        # Мешканці, в П.І.Б. яких одне зі слів (разом з наступними) починається з text, у порядку імен
+        result, seen = [], set()
+        for _, ident in self._name_keys.prefix(normalize(text)):
+            if ident not in seen:
+                seen.add(ident)
+                result.append(self._records[ident])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def by_phone(self, phone, limit=None):
+        # Мешканці, номер телефону яких (лише цифри) починається з цифр phone
+        digits = phone_digits(phone)
+        if not digits:
+            return []
+        result = []
+        for _, ident in self._phone_keys.prefix(digits):
+            result.append(self._records[ident])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def fuzzy(self, text, limit=10, min_score=0.3):
+        # Нечіткий пошук: кандидати відбираються за спільними рідкісними триграмами, а потім
+        # оцінюються коефіцієнтом Жаккара за всіма триграмами. Повертає [(оцінка, мешканець)] за спаданням оцінки.
+        query = normalize(text)
+        if not query or not self._records:
+            return []
+        grams = trigrams(query)
+        postings = [self._grams[gram] for gram in grams if gram in self._grams]
+        if not postings:
+            return []
+        ceiling = max(self.min_gram_postings, self.max_gram_share * len(self._records))
+        selective = [posting for posting in postings if len(posting) <= ceiling] or [min(postings, key=len)]
+        counts = Counter()
+        for posting in selective:
+            counts.update(posting)
+
+        scored = []
+        for ident, _ in heapq.nlargest(limit * 20, counts.items(), key=itemgetter(1)):
+            name = self._names.get(ident)
+            if name is None:
+                continue
+            candidate = trigrams(name)
+            score = len(grams & candidate) / len(grams | candidate)
+            if score >= min_score:
+                scored.append((score, name, ident))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, self._records[ident]) for score, _, ident in scored[:limit]]
+
+    def search(self, text, limit=10):
+        # Пошук з ранжуванням: повний збіг П.І.Б. або телефону - 1.0, префікс П.І.Б. - 0.9, префікс телефону - 0.85,
+        # префікс іншого слова П.І.Б. - 0.8, нечіткі збіги - їхня оцінка, помножена на 0.8.
+        # Повертає [(оцінка, мешканець)] за спаданням оцінки.
+        query = normalize(text)
+        if not query:
+            return []
+        scores = {}
+
+        def offer(ident, score):
+            if scores.get(ident, 0.0) < score:
+                scores[ident] = score
+
+        for scanned, (key, ident) in enumerate(self._name_keys.prefix(query)):
+            if scanned >= limit * 5:
+                break
+            name = self._names[ident]
+            offer(ident, 1.0 if name == query else 0.9 if key == name else 0.8)
+        digits = phone_digits(query)
+        if digits and not any(char.isalpha() for char in query):
+            for scanned, (phone, ident) in enumerate(self._phone_keys.prefix(digits)):
+                if scanned >= limit * 5:
+                    break
+                offer(ident, 1.0 if phone == digits else 0.85)
+        if len(scores) < limit:
+            for score, resident in self.fuzzy(query, limit):
+                offer(self._ids[resident], score * 0.8)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._names[item[0]]))
+        return [(score, self._records[ident]) for ident, score in ranked[:limit]]
+
+    def suggest(self, text, limit=3):
+        # Різні П.І.Б., схожі на text, для підказки "можливо, ви мали на увазі"
+        names = []
+        for _, resident in self.fuzzy(text, limit * 3):
+            if resident.full_name not in names:
+                names.append(resident.full_name)
+                if len(names) >= limit:
+                    break
+        return names
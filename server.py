@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from batch import BatchProcessor
+from main import ApartmentManager, ResidentManager, SQLiteStorage, Storage, apartments_data_file, residents_data_file
+
+
+class HttpError(Exception):
+    # Помилка запиту, що повертається клієнту з відповідним кодом стану
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RegistryServer:
+    # Асинхронний HTTP/JSON сервер над менеджерами мешканців і квартир.
+    # Запити від багатьох клієнтів обробляються одночасно; зміни, що стосуються однієї квартири,
+    # виконуються під її замком, а збереження у сховище об'єднуються і виконуються у фоні.
+    reasons = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 500: "Internal Server Error"}
+
+    def __init__(self, resident_manager, apartment_manager, storage=None, save_delay=1.0):
+        self.resident_manager = resident_manager  # Менеджер мешканців
+        self.apartment_manager = apartment_manager  # Менеджер квартир
+        self.storage = storage  # Сховище, у яке у фоні зберігаються зміни (необов'язкове)
+        self.save_delay = save_delay  # Скільки секунд накопичувати зміни перед збереженням
+        self.processor = BatchProcessor(resident_manager, apartment_manager)
+        self._locks = {}  # Номер квартири -> [asyncio.Lock, кількість запитів, що його тримають чи чекають]
+        self._save_requested = None
+        self._saver = None
+        self._pending_write = None  # Запис у сховище, що виконується в окремому потоці
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        # Запускає сервер і фонове збереження; повертає asyncio.Server
+        self._save_requested = asyncio.Event()
+        self._saver = asyncio.create_task(self._save_loop())
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server
+
+    async def stop(self):
+        # Зупиняє сервер і зберігає зміни, що ще не потрапили у сховище
+        self._server.close()
+        await self._server.wait_closed()
+        self._saver.cancel()
+        try:
+            await self._saver
+        except asyncio.CancelledError:
+            pass
+        if self._pending_write is not None:
+            await self._pending_write
+        if self.storage is not None and self._save_requested.is_set():
+            self.storage.save_changes()
+
+    async def _save_loop(self):
+        # Після першої зміни чекає save_delay секунд, щоб одним збереженням охопити всі зміни за цей час.
+        # Зміни збираються в циклі подій, а запис у файли чи базу виконується в окремому потоці,
+        # тож fsync і повне переписування файлів не затримують обробку запитів.
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._save_requested.wait()
+            await asyncio.sleep(self.save_delay)
+            self._save_requested.clear()
+            if self.storage is not None:
+                self._pending_write = loop.run_in_executor(None, self.storage.prepare_save())
+                await asyncio.shield(self._pending_write)
+                self._pending_write = None
+
+    @asynccontextmanager
+    async def _locked(self, *apartment_numbers):
+        # Тримає замки квартир (у сталому порядку, без взаємоблокувань). Запис про замок видаляється, щойно його
+        # ніхто не тримає і не чекає, тож кількість замків не росте разом із номерами, які надсилають клієнти.
+        entries = []
+        for apartment_number in sorted(set(apartment_numbers)):
+            entry = self._locks.get(apartment_number)
+            if entry is None:
+                entry = self._locks[apartment_number] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            entries.append((apartment_number, entry))
+        acquired = []
+        try:
+            for _, (lock, _) in entries:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            for apartment_number, entry in entries:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[apartment_number]
+
+    @staticmethod
+    def _require_strings(data, *fields, optional=()):
+        # Перевіряє, що обов'язкові поля (і необов'язкові, якщо вони є) - рядки
+        for field in fields + tuple(field for field in optional if field in data):
+            if not isinstance(data.get(field), str):
+                raise ValueError(f"Поле {field} має бути рядком.")
+
+    async def handle_connection(self, reader, writer):
+        # Обробляє запити одного з'єднання (HTTP/1.1 keep-alive) до його закриття
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, body)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {self.reasons[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        # Виконує запит і повертає (код стану, дані відповіді)
+        url = urlsplit(target)
+        path = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise ValueError("Тіло запиту має бути JSON-об'єктом.")
+            if path == ["apartments"] and method == "GET":
+                return 200, [self.apartment_data(a) for a in self.find_apartments(query)]
+            if path == ["apartments"] and method == "POST":
+                self._require_strings(data, "apartment_number")
+                async with self._locked(data["apartment_number"]):
+                    return self.mutate("add_apartment", data, created=True)
+            if len(path) == 2 and path[0] == "apartments":
+                if method == "GET":
+                    apartment = self.apartment_manager.get_apartment(path[1])
+                    if apartment is None:
+                        raise HttpError(404, f"Квартира {path[1]} не знайдена.")
+                    return 200, self.apartment_data(apartment)
+                if method == "DELETE":
+                    async with self._locked(path[1]):
+                        return self.mutate("remove_apartment", {"apartment_number": path[1]})
+            if path == ["vacant"] and method == "GET":
+                vacant = self.apartment_manager.get_vacant_apartments()
+                return 200, {"count": len(vacant), "apartments": [a.apartment_number for a in vacant]}
+            if path == ["residents"] and method == "GET":
+                return 200, [self.resident_data(r) for r in self.resident_manager.find_residents(query.get("name", ""))]
+            if path == ["residents"] and method == "POST":
+                self._require_strings(data, "full_name", optional=("phone",))
+                return self.mutate("add_resident", data, created=True)
+            if path == ["residents"] and method == "DELETE":
+                return await self.mutate_resident("remove_resident", {"full_name": query.get("name", "")})
+            if path == ["assign"] and method == "POST":
+                self._require_strings(data, "full_name", "apartment_number")
+                return await self.mutate_resident("assign", data, data["apartment_number"])
+            if path == ["evacuate"] and method == "POST":
+                self._require_strings(data, "full_name")
+                return await self.mutate_resident("evacuate", data)
+            raise HttpError(404 if method in ("GET", "POST", "DELETE") else 405, "Невідомий запит.")
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"Внутрішня помилка сервера: {e!r}"}
+
+    def find_apartments(self, query):
+        # Перетворює параметри запиту (floor, floor_min, floor_max, ... order_by, limit, offset) на find_apartments
+        conditions = {}
+        for field, cast in (("floor", int), ("num_rooms", int), ("area", float)):
+            if field in query:
+                conditions[field] = cast(query[field])
+            elif f"{field}_min" in query or f"{field}_max" in query:
+                low, high = query.get(f"{field}_min"), query.get(f"{field}_max")
+                conditions[field] = (cast(low) if low else None, cast(high) if high else None)
+        return self.apartment_manager.find_apartments(
+            **conditions, order_by=query.get("order_by"), descending=query.get("descending") == "1",
+            limit=int(query["limit"]) if "limit" in query else None, offset=int(query.get("offset", 0)))
+
+    async def mutate_resident(self, op, data, target_number=None):
+        # Змінює заселення мешканця під замками його поточної і нової квартир. Нова квартира блокується,
+        # лише якщо вона існує: для неіснуючої операція однаково завершиться помилкою.
+        residents = self.resident_manager.find_residents(data["full_name"])
+        numbers = []
+        if target_number is not None and self.apartment_manager.get_apartment(target_number) is not None:
+            numbers.append(target_number)
+        if residents and residents[0].apartment is not None:
+            numbers.append(residents[0].apartment.apartment_number)
+        async with self._locked(*numbers):
+            return self.mutate(op, data)
+
+    def mutate(self, op, data, created=False):
+        try:
+            ok, message = self.processor.handlers[op](data)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Некоректні параметри запиту: {e!r}")
+        if not ok:
+            raise HttpError(409, message)
+        self._save_requested.set()
+        return (201 if created else 200), {"message": message}
+
+    @staticmethod
+    def apartment_data(apartment):
+        return {"apartment_number": apartment.apartment_number, "floor": apartment.floor, "area": apartment.area,
+                "num_rooms": apartment.num_rooms, "residents": [r.full_name for r in apartment.residents]}
+
+    @staticmethod
+    def resident_data(resident):
+        return {"full_name": resident.full_name, "age": resident.age, "phone": resident.phone,
+                "apartment": resident.apartment.apartment_number if resident.apartment is not None else None}
+
+
+async def serve(server, host, port):
+    await server.start(host, port)
+    print(f"Сервер працює на http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON сервер обліку мешканців і квартир")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--residents", default=residents_data_file, help="CSV-файл мешканців")
+    parser.add_argument("--apartments", default=apartments_data_file, help="CSV-файл квартир")
+    parser.add_argument("--sqlite", metavar="FILE", help="використовувати базу SQLite замість CSV-файлів")
+    parser.add_argument("--save-delay", type=float, default=1.0, help="затримка об'єднаного збереження, с")
+    args = parser.parse_args()
+
+    resident_manager = ResidentManager()
+    apartment_manager = ApartmentManager()
+    if args.sqlite:
+        storage = SQLiteStorage(args.sqlite, resident_manager, apartment_manager)
+    else:
+        storage = Storage(args.residents, args.apartments, resident_manager, apartment_manager)
+    storage.load_data()
+    try:
+        asyncio.run(serve(RegistryServer(resident_manager, apartment_manager, storage, args.save_delay),
+                          args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from columnar import ColumnarStore
+
+# Формат двійкового знімка (усі числа little-endian, кожна секція вирівняна на 8 байтів):
+#   заголовок: MAGIC, кількість квартир A, мешканців R, рядків S, розмір таблиці рядків B (uint64);
+#   квартири: номер (uint32, індекс у таблиці рядків), поверх (int32), кількість кімнат (int32), площа (float64);
+#   мешканці: П.І.Б. (uint32), телефон (uint32), вік (int32), індекс квартири (int32, -1 - не заселений);
+#   таблиця рядків: зміщення (uint64 * (S + 1)) і рядки UTF-8, кожен із завершальним нульовим байтом.
+MAGIC = b"APTSNAP1"
+HEADER = struct.Struct("<8s4Q")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _check_byteorder():
+    # Стовпці читаються і пишуться в рідному порядку байтів, тож формат підтримується лише на little-endian
+    if sys.byteorder != "little":
+        raise ValueError("Двійкові знімки підтримуються лише на little-endian платформах")
+
+
+def write_snapshot(file_name, apartments, residents):
+    # Записує квартири і мешканців (об'єкти з атрибутами Apartment/Resident) у двійковий знімок
+    _check_byteorder()
+    strings = {}
+
+    def string_id(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    apartment_index = {}
+    numbers, floors, num_rooms, areas = array('I'), array('i'), array('i'), array('d')
+    for apartment in apartments:
+        apartment_index[apartment.apartment_number] = len(numbers)
+        numbers.append(string_id(apartment.apartment_number))
+        floors.append(apartment.floor)
+        num_rooms.append(apartment.num_rooms)
+        areas.append(apartment.area)
+
+    names, phones, ages, links = array('I'), array('I'), array('i'), array('i')
+    for resident in residents:
+        names.append(string_id(resident.full_name))
+        phones.append(string_id(resident.phone))
+        ages.append(resident.age)
+        apartment = resident.apartment
+        links.append(apartment_index.get(apartment.apartment_number, -1) if apartment is not None else -1)
+
+    encoded = [value.encode("utf-8") + b"\0" for value in strings]
+    offsets = array('Q', [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    blob = b"".join(encoded)
+
+    temp_file_name = file_name + ".tmp"
+    try:
+        with open(temp_file_name, mode='wb') as file:
+            file.write(HEADER.pack(MAGIC, len(numbers), len(names), len(strings), len(blob)))
+            for column in (numbers, floors, num_rooms, areas, names, phones, ages, links, offsets):
+                file.write(b"\0" * (_align(file.tell()) - file.tell()))
+                file.write(column.tobytes())
+            file.write(blob)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file_name, file_name)
+    except BaseException:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+
+
+class Snapshot:
+    # Читає двійковий знімок через mmap: числові стовпці доступні як memoryview без копіювання,
+    # а рядки декодуються лише при зверненні до них
+    def __init__(self, file_name):
+        _check_byteorder()
+        self.file_name = file_name
+        with open(file_name, mode='rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._view) < HEADER.size or self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Файл {file_name} не є знімком реєстру")
+        _, self.apartment_count, self.resident_count, self.string_count, blob_size = HEADER.unpack_from(self._view)
+
+        # Розміщення стовпців обчислюється із заголовка і звіряється з розміром файлу до створення подань,
+        # щоб обрізаний чи пошкоджений файл не читався частково
+        offset = HEADER.size
+        layout = []
+        for typecode, count in (('I', self.apartment_count), ('i', self.apartment_count), ('i', self.apartment_count),
+                                ('d', self.apartment_count), ('I', self.resident_count), ('I', self.resident_count),
+                                ('i', self.resident_count), ('i', self.resident_count), ('Q', self.string_count + 1)):
+            offset = _align(offset)
+            size = count * array(typecode).itemsize
+            layout.append((typecode, offset, size))
+            offset += size
+        if offset + blob_size != len(self._view):
+            self.close()
+            raise ValueError(f"Знімок {file_name} пошкоджений: розмір файлу не відповідає заголовку")
+        columns = [self._view[start:start + size].cast(typecode) for typecode, start, size in layout]
+        (self.apartment_numbers, self.floors, self.num_rooms, self.areas,
+         self.full_names, self.phones, self.ages, self.resident_apartments, self._offsets) = columns
+        self._blob = self._view[offset:offset + blob_size]
+        if self._offsets[0] != 0 or self._offsets[-1] != blob_size:
+            self.close()
+            raise ValueError(f"Знімок {file_name} пошкоджений: таблиця рядків не відповідає заголовку")
+
+    def close(self):
+        # Звільняє всі подання перед закриттям mmap
+        for name in ("apartment_numbers", "floors", "num_rooms", "areas", "full_names", "phones", "ages",
+                     "resident_apartments", "_offsets", "_blob", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string(self, index):
+        # Повертає рядок з таблиці рядків за його індексом
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1] - 1], "utf-8")
+
+    def strings(self):
+        # Декодує всю таблицю рядків за одну операцію. Рядки можуть містити нульові символи, тоді частин
+        # після розбиття більше, ніж рядків, і таблиця декодується за зміщеннями
+        table = str(self._blob, "utf-8").split("\0")
+        if len(table) != self.string_count + 1:
+            return [self.string(index) for index in range(self.string_count)]
+        del table[-1]
+        return table
+
+    def to_columnar(self):
+        # Переносить знімок у ColumnarStore: числові стовпці копіюються цілими блоками
+        table = self.strings()
+        return ColumnarStore.from_columns(
+            [table[index] for index in self.apartment_numbers], _copy('i', self.floors), _copy('d', self.areas),
+            _copy('i', self.num_rooms), [table[index] for index in self.full_names], _copy('i', self.ages),
+            [table[index] for index in self.phones], _copy('i', self.resident_apartments))
+
+
+def _copy(typecode, view):
+    # Копіює стовпець з memoryview у array одним блоком пам'яті
+    column = array(typecode)
+    column.frombytes(view.cast('B'))
+    return column